@@ -0,0 +1,151 @@
+import heapq
+import itertools
+import math
+import threading
+import time
+
+from shared.metrics import ADMISSION_INFLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED, ADMISSION_WAIT_SECONDS
+
+# Lower runs first
+PRIORITY_CHEAP = 0  # answered from a cache once encoded
+PRIORITY_NORMAL = 1  # may need the LLM
+PRIORITY_BULK = 2  # /api/query/batch
+
+PRIORITY_NAMES = {PRIORITY_CHEAP: "cheap", PRIORITY_NORMAL: "normal", PRIORITY_BULK: "bulk"}
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing when a stage is saturated; retry_after is in seconds"""
+
+    def __init__(self, stage, reason, retry_after):
+        super().__init__(f"{stage} stage overloaded ({reason})")
+        self.stage = stage
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class _Waiter:
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+        self.cancelled = False
+        self.shed = False  # dropped from a full queue to make room for a better-priority caller
+
+
+class StageLimiter:
+    """
+    Bounded concurrency for one pipeline stage (model encode, LLM calls).
+
+    At most `limit` callers run the stage at once; the rest wait in a priority
+    queue (lower priority value first, FIFO within a priority). When `max_queue`
+    callers are already waiting, the worst-priority waiter is dropped to make room
+    for a better-priority arrival, or the arrival itself is turned away when none
+    is worse; a caller that has waited `max_wait` seconds is turned away too.
+    Dropped callers get Overloaded so the client can back off instead of timing out.
+    """
+
+    def __init__(self, name, limit, max_queue, max_wait):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._inflight = 0
+        self._queue = []  # heap of (priority, seq, waiter)
+        self._queued = 0  # waiters not cancelled
+        self._seq = itertools.count()
+        self._avg_hold = None  # moving average of seconds a slot is held, for Retry-After
+
+    def retry_after(self):
+        """Seconds until the current queue would likely drain"""
+        hold = self._avg_hold or 1.0
+        return max(1, math.ceil((self._queued + 1) * hold / self.limit))
+
+    def _reject(self, reason):
+        ADMISSION_REJECTED.labels(stage=self.name, reason=reason).inc()
+        return Overloaded(self.name, reason, self.retry_after())
+
+    def acquire(self, priority=PRIORITY_NORMAL):
+        """Blocks until a slot is free; returns seconds waited or raises Overloaded"""
+        start = time.perf_counter()
+        with self._lock:
+            if self._inflight < self.limit and not self._queued:
+                self._inflight += 1
+                ADMISSION_INFLIGHT.labels(stage=self.name).set(self._inflight)
+                ADMISSION_WAIT_SECONDS.labels(stage=self.name, priority=PRIORITY_NAMES[priority]).observe(0)
+                return 0.0
+            if self._queued >= self.max_queue and not self._shed_worse_than(priority):
+                raise self._reject("queue_full")
+            waiter = _Waiter()
+            heapq.heappush(self._queue, (priority, next(self._seq), waiter))
+            self._queued += 1
+            ADMISSION_QUEUE_DEPTH.labels(stage=self.name).set(self._queued)
+
+        waiter.event.wait(self.max_wait)
+        with self._lock:
+            if waiter.shed:
+                raise self._reject("queue_full")
+            if not waiter.granted:
+                waiter.cancelled = True
+                self._queued -= 1
+                ADMISSION_QUEUE_DEPTH.labels(stage=self.name).set(self._queued)
+                raise self._reject("timeout")
+
+        waited = time.perf_counter() - start
+        ADMISSION_WAIT_SECONDS.labels(stage=self.name, priority=PRIORITY_NAMES[priority]).observe(waited)
+        return waited
+
+    def _shed_worse_than(self, priority):
+        """Drops the last-queued waiter of the worst priority if it is worse than `priority`; call with the lock held"""
+        live = [entry for entry in self._queue if not entry[2].cancelled]
+        if not live:
+            return False
+        worst_priority, _, waiter = max(live, key=lambda entry: entry[:2])
+        if worst_priority <= priority:
+            return False
+        waiter.cancelled = True
+        waiter.shed = True
+        self._queued -= 1
+        waiter.event.set()
+        return True
+
+    def release(self, held_seconds=None):
+        with self._lock:
+            if held_seconds is not None:
+                self._avg_hold = held_seconds if self._avg_hold is None else 0.8 * self._avg_hold + 0.2 * held_seconds
+            # Hand the slot straight to the best waiter so newcomers can't jump the queue
+            while self._queue:
+                _, _, waiter = heapq.heappop(self._queue)
+                if waiter.cancelled:
+                    continue
+                waiter.granted = True
+                self._queued -= 1
+                ADMISSION_QUEUE_DEPTH.labels(stage=self.name).set(self._queued)
+                waiter.event.set()
+                return
+            self._inflight -= 1
+            ADMISSION_INFLIGHT.labels(stage=self.name).set(self._inflight)
+
+    def slot(self, priority=PRIORITY_NORMAL):
+        return _Slot(self, priority)
+
+    def stats(self):
+        with self._lock:
+            return {"inflight": self._inflight, "queued": self._queued, "limit": self.limit, "max_queue": self.max_queue}
+
+
+class _Slot:
+    """with limiter.slot(priority): ... holds one slot of the stage for the block"""
+
+    def __init__(self, limiter, priority):
+        self.limiter = limiter
+        self.priority = priority
+
+    def __enter__(self):
+        self.limiter.acquire(self.priority)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.limiter.release(time.perf_counter() - self.start)
+        return False
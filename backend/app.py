@@ -1,16 +1,32 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g, Response
 from flask_cors import CORS
-from sentence_transformers import SentenceTransformer, util
-from collections import OrderedDict
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import wraps
 
 import numpy as np
 import os
-import networkx as nx
 import pickle
 import json
-import torch
+import math
+import sys
+import threading
 import time
-from openai import OpenAI
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from router import build_route_indexes, route_query
+from retrieval import top_section, top_sections, build_context, build_messages
+from warm_cache import WarmCache
+from impact import ImpactIndex
+from shared_index import build_corpus, load_or_build_embeddings, memory_report, sibling_memory_report
+from startup import StartupTracker
+from singleflight import SingleFlight, normalize_query, query_signature
+from admission import StageLimiter, Overloaded, PRIORITY_CHEAP, PRIORITY_NORMAL, PRIORITY_BULK
+from shared.llm import CircuitOpenError, LLMError
+from shared.tables import TableIndex
+from shared.metrics import logger, stage, record_request, metrics_response
 
 # Load environment key
 from dotenv import load_dotenv
@@ -19,7 +35,38 @@ load_dotenv()
 app = Flask(__name__)
 CORS(app)
 
-client = OpenAI()
+# Filled in by the startup stages below; torch, sentence_transformers and
+# openai are imported there so the server can bind before they load
+llm = None
+G = None
+model = None
+node_ids, corpus, corpus_embeddings = [], [], None
+route_indexes = None
+impact_index = None
+warm_cache = WarmCache()
+table_index = TableIndex()
+
+# Concurrent identical (or fuzzy-similar) questions share one retrieval + LLM call
+inflight = SingleFlight(threshold=0.85)
+
+# Bounded in-flight work per stage; excess requests queue by priority, then get 503 + Retry-After
+encode_limiter = StageLimiter(
+    "encode",
+    limit=int(os.getenv("ENCODE_CONCURRENCY", "4")),
+    max_queue=int(os.getenv("ENCODE_QUEUE", "32")),
+    max_wait=float(os.getenv("ENCODE_MAX_WAIT", "5")),
+)
+llm_limiter = StageLimiter(
+    "llm",
+    limit=int(os.getenv("LLM_CONCURRENCY", "16")),
+    max_queue=int(os.getenv("LLM_QUEUE", "64")),
+    max_wait=float(os.getenv("LLM_MAX_WAIT", "30")),
+)
+
+# Bulk questions from /api/query/batch share one bounded pool of LLM calls
+MAX_BATCH_SIZE = int(os.getenv("MAX_BATCH_SIZE", "500"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "8"))
+batch_pool = ThreadPoolExecutor(max_workers=BATCH_LLM_CONCURRENCY, thread_name_prefix="batch-llm")
 
 CACHE_PATH = os.path.join(os.path.dirname(__file__), "cache_gpt_responses.json")
 
@@ -31,8 +78,28 @@ def load_cache():
     return OrderedDict()
 
 MAX_CACHE_SIZE = 50  # You can change this anytime
-
-def save_cache(query, answer):
+cache_lock = threading.Lock()
+# Embeddings of cached queries, so fuzzy lookups only encode entries this worker hasn't seen;
+# trimmed to the cache's current keys under cache_lock, so it never outgrows the cache
+cache_embeddings = {}
+# Signatures of those queries, for picking the admission priority (replaced, never mutated)
+cache_signatures = frozenset()
+
+def save_cache(query, answer, embedding=None):
+    with cache_lock:
+        cache = _save_cache(query, answer)
+        if embedding is not None:
+            cache_embeddings[query] = embedding
+        _trim_cache_embeddings(cache)
+
+def _trim_cache_embeddings(cache_queries):
+    """Drops embeddings of evicted entries; call with cache_lock held"""
+    global cache_signatures
+    for q in [q for q in cache_embeddings if q not in cache_queries]:
+        del cache_embeddings[q]
+    cache_signatures = frozenset(query_signature(q) for q in cache_embeddings)
+
+def _save_cache(query, answer):
     cache = load_cache()
 
     # Move existing query to the end if it exists
@@ -46,184 +113,447 @@ def save_cache(query, answer):
     while len(cache) > MAX_CACHE_SIZE:
         cache.popitem(last=False)  # Removes the oldest entry
 
-    with open(CACHE_PATH, "w", encoding="utf-8") as f:
+    # Write-then-rename so concurrent readers never see a half-written file
+    tmp_path = f"{CACHE_PATH}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
         json.dump(cache, f, indent=2)
-
-def find_similar_cached_response(query_text, threshold=0.85):
+    os.replace(tmp_path, CACHE_PATH)
+    return cache
+
+def cached_query_embeddings(cache_queries, priority=PRIORITY_CHEAP):
+    """
+    Embedding matrix for the cached queries. Entries written by other workers
+    (or before a restart) are encoded once, in one batch, under the encode limit.
+    """
+    # Snapshot under the lock: another thread's trim may drop entries while we encode
+    with cache_lock:
+        known = {q: cache_embeddings[q] for q in cache_queries if q in cache_embeddings}
+    missing = [q for q in cache_queries if q not in known]
+    if missing:
+        with encode_limiter.slot(priority), stage("encode", request_id=g.get("request_id")):
+            vectors = model.encode(missing, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        known.update(zip(missing, vectors))
+        with cache_lock:
+            cache_embeddings.update(zip(missing, vectors))
+            _trim_cache_embeddings(set(load_cache()))
+    return np.array([known[q] for q in cache_queries])
+
+def likely_cached(query_text):
+    """True when a cache will most likely answer the question once it is encoded"""
+    signature = query_signature(query_text)
+    return signature in warm_cache.signatures or signature in cache_signatures
+
+def find_similar_cached_response(query_text, query_embedding, threshold=0.85):
     cache = load_cache()
     if not cache:
         return None
 
     cache_queries = list(cache.keys())
-    query_embedding = model.encode(query_text, convert_to_tensor=True)
-    cache_embeddings = model.encode(cache_queries, convert_to_tensor=True)
-
-    similarities = util.pytorch_cos_sim(query_embedding, cache_embeddings)[0]
-    best_idx = int(np.argmax(similarities.cpu().numpy()))
-    best_score = similarities[best_idx].item()
+    similarities = cached_query_embeddings(cache_queries) @ query_embedding
+    best_idx = int(np.argmax(similarities))
+    best_score = float(similarities[best_idx])
 
     if best_score >= threshold:
-        print(f"🤝 Fuzzy matched with: '{cache_queries[best_idx]}' (score={best_score:.2f})")
+        logger.info("[%s] 🤝 Fuzzy matched with: '%s' (score=%.2f)", g.get("request_id", "-"), cache_queries[best_idx], best_score)
         return cache[cache_queries[best_idx]]
 
     return None
 
-def detect_answer_length(query: str) -> str:
-    query = query.lower()
-    if any(kw in query for kw in ["in short", "briefly", "summary", "quickly", "short answer"]):
-        return "short"
-    elif any(kw in query for kw in ["in detail", "elaborate", "long answer", "full explanation", "explain thoroughly"]):
-        return "long"
-    else:
-        return "normal"
-
-# Load graph
-with open(os.path.join(os.path.dirname(__file__), "../data/unified_graph.pkl"), "rb") as f:
-    G = pickle.load(f)
-
-# Load model
-model = SentenceTransformer('all-MiniLM-L6-v2')
-
-# Build documents
-node_ids = []
-corpus = []
-
-for node_id, attr in G.nodes(data=True):
-    text = attr.get("text") or ""
-    title = attr.get("title") or ""
-    if not isinstance(text, str):
-        text = str(text)
-    if not isinstance(title, str):
-        title = str(title)
-
-    combined = f"{title}. {text}".strip()
-    if combined:
-        corpus.append(combined)
-        node_ids.append(node_id)
-
-corpus_embeddings = model.encode(corpus, convert_to_tensor=True)
+GRAPH_PATH = os.path.join(os.path.dirname(__file__), "../data/unified_graph.pkl")
+TABLE_STORE_PATH = os.path.join(os.path.dirname(__file__), "../data/table_store.json")
+MODEL_NAME = 'all-MiniLM-L6-v2'
+
+def load_graph():
+    global G
+    with open(GRAPH_PATH, "rb") as f:
+        G = pickle.load(f)
+
+def build_indexes():
+    global route_indexes, impact_index
+    # Indexes for structural questions (section lookups, change listings)
+    route_indexes = build_route_indexes(G)
+    # Reachability index for /api/impact (condensed DAGs are built here, not on the first request)
+    impact_index = ImpactIndex(G)
+
+def load_tables():
+    global table_index
+    # Row-level index over the spec tables (IEI / cause lookups), built by graph_builder
+    table_index = TableIndex.load(TABLE_STORE_PATH)
+    logger.info("📊 %d table rows loaded", len(table_index))
+
+def load_model():
+    global model
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(MODEL_NAME)
+
+def load_embeddings():
+    global node_ids, corpus, corpus_embeddings
+    # Embeddings are memory-mapped so forked workers share them
+    node_ids, corpus = build_corpus(G)
+    corpus_embeddings = load_or_build_embeddings(model, MODEL_NAME, corpus, node_ids, GRAPH_PATH)
+
+def load_warm_cache():
+    global warm_cache
+    # Answers pre-generated after the last release ingest (graph_builder/pregenerate_answers.py)
+    warm_cache = WarmCache.load()
+    logger.info("🔥 %d pre-generated answers loaded", len(warm_cache))
+
+def load_llm_client():
+    global llm
+    from shared.llm import get_llm_provider
+    llm = get_llm_provider()
+
+def warmup():
+    # First encode pays for lazy kernel/tokenizer initialisation; do it before taking traffic
+    query_embedding = model.encode("warmup query", convert_to_numpy=True, normalize_embeddings=True)
+    int(np.argmax(corpus_embeddings @ query_embedding))
+    # Encode the response cache's queries now rather than on the first fuzzy lookup
+    cache_queries = list(load_cache())
+    if cache_queries:
+        vectors = model.encode(cache_queries, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+        with cache_lock:
+            cache_embeddings.update(zip(cache_queries, vectors))
+            _trim_cache_embeddings(set(cache_queries))
+
+STARTUP_STAGES = [
+    ("graph", load_graph),
+    ("indexes", build_indexes),
+    ("tables", load_tables),
+    ("model", load_model),
+    ("embeddings", load_embeddings),
+    ("warm_cache", load_warm_cache),
+    ("llm_client", load_llm_client),
+    ("warmup", warmup),
+]
+startup = StartupTracker([name for name, _ in STARTUP_STAGES])
+
+def requires_ready(view):
+    """Rejects requests with 503 + Retry-After until every startup stage is done"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not startup.ready:
+            response = jsonify({"answer": "The assistant is still starting up, please retry shortly.", "highlight": [], "startup": startup.report()})
+            response.headers["Retry-After"] = "5"
+            return response, 503
+        return view(*args, **kwargs)
+    return wrapper
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and serving HTTP"""
+    return jsonify({"status": "alive", "uptime_seconds": startup.report()["uptime_seconds"]})
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: all components loaded and warmed up"""
+    report = startup.report()
+    report["llm_circuit"] = llm.breaker.state if llm else None
+    report["admission"] = {"encode": encode_limiter.stats(), "llm": llm_limiter.stats()}
+    return jsonify(report), (200 if report["ready"] else 503)
+
+@app.before_request
+def assign_request_id():
+    g.request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex[:12]
+
+@app.after_request
+def add_request_id_header(response):
+    response.headers["X-Request-ID"] = g.get("request_id", "")
+    # How a query was served (llm, fuzzy_cache, fast_path...), for load tests and clients
+    if "outcome" in g:
+        response.headers["X-Query-Outcome"] = g.outcome
+    return response
+
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Prometheus exposition of per-stage histograms and request counters"""
+    body, content_type = metrics_response()
+    return Response(body, content_type=content_type)
+
+def answer_query(query_text, query_embedding):
+    """
+    Warm cache + retrieval + fuzzy cache + GPT for one question.
+    Returns (response, outcome); raises LLMError if the model fails.
+    """
+    rid = g.request_id
+
+    # 🔥 Pre-generated answers for the changed sections
+    with stage("cache_lookup", request_id=rid):
+        warm_hit = warm_cache.lookup(normalize_query(query_text), query_embedding)
+    if warm_hit:
+        matched, entry, score = warm_hit
+        logger.info("[%s] 🔥 Served from warm cache ('%s', score=%.2f)", rid, matched, score)
+        return {
+            "answer": entry["answer"],
+            "highlight": entry.get("highlight", []),
+        }, "warm_cache"
+
+    with stage("similarity", request_id=rid):
+        top_node_id = top_section(query_embedding, corpus_embeddings, node_ids)
+    with stage("table_lookup", request_id=rid):
+        table_rows = table_index.search(query_text)
+    with stage("context_build", request_id=rid):
+        full_context, highlights = build_context(G, top_node_id, query_text, table_rows=table_rows)
+
+    # 🔍 Try fuzzy match from cache
+    with stage("cache_lookup", request_id=rid):
+        cached_answer = find_similar_cached_response(query_text, query_embedding)
+    if cached_answer:
+        logger.info("[%s] ⚡ Served from fuzzy cache", rid)
+        return {
+            "answer": cached_answer,
+            "highlight": [],
+        }, "fuzzy_cache"
+
+    messages, max_tokens = build_messages(query_text, full_context)
+    logger.debug("[%s] Full context:\n%s", rid, full_context)
+
+    try:
+        # Pooled client with a per-call deadline, bounded retries and a circuit breaker
+        with llm_limiter.slot(PRIORITY_NORMAL), stage("llm", request_id=rid):
+            answer = llm.complete(messages=messages, temperature=0.4, max_tokens=max_tokens)
+    except LLMError as e:
+        logger.error("[%s] ❌ Error during LLM request: %s", rid, e)
+        raise
+
+    logger.debug("[%s] 🔍 Final Answer Preview:\n%s", rid, answer)
+    with stage("cache_write", request_id=rid):
+        save_cache(query_text, answer, query_embedding)
+
+    return {
+        "answer": answer,
+        "highlight": highlights,
+    }, "llm"
 
 @app.route("/api/query", methods=["POST"])
+@requires_ready
 def query():
+    start_time = time.perf_counter()
+    rid = g.request_id
+    outcome = "error"
     try:
-        start_time = time.perf_counter()
         data = request.get_json(force=True)
-        print("Received data from frontend:", data)
+        logger.debug("[%s] Received data from frontend: %s", rid, data)
 
         query_text = data.get("query", "").strip().lower()
         if not query_text:
+            outcome = "empty"
             return jsonify({"answer": "Please enter a valid question.", "highlight": []})
 
-        # Encode query and compute similarity
-        query_embedding = model.encode(query_text, convert_to_tensor=True)
-
-        # Compute cosine similarities
-        similarities = util.pytorch_cos_sim(query_embedding, corpus_embeddings)[0]
-        top_idx = int(np.argmax(similarities.cpu().numpy()))
-        top_node_id = node_ids[top_idx]
-        top_data = G.nodes[top_node_id]
-        highlights = [top_node_id]
-
-        # Prepare context: top node + limited neighbors, truncating text
-        def format_section(nid):
-            data = G.nodes.get(nid, {})
-            title = data.get("title", nid)
-            text = data.get("text", "")
-            return f"{title}:\n{text[:500]}..."  # truncate long texts
-
-        context_sections = [format_section(top_node_id)]
-        neighbors = top_data.get("neighbors", {})
-
-        neighbor_limit = 4  # You can increase/decrease this as needed
-        neighbor_count = 0
-
-        for rel in ("parent", "siblings", "children"):
-            val = neighbors.get(rel)
-            if isinstance(val, list):
-                for nid in val:
-                    if neighbor_count >= neighbor_limit:
-                        break
-                    context_sections.append(format_section(nid))
-                    highlights.append(nid)
-                    neighbor_count += 1
-
-        full_context = "\n\n".join(context_sections)
-        
-        # 🔍 Try fuzzy match from cache
-        cached_answer = find_similar_cached_response(query_text)
-        if cached_answer:
-            end_time = time.perf_counter()
-            print(f"⚡ Served from fuzzy cache. Done in {end_time - start_time:.2f}")
+        # 🚦 Structural questions are answered straight from the graph, no embedding or GPT
+        # (and without taking any admission slot)
+        with stage("route", request_id=rid):
+            routed = route_query(query_text, G, route_indexes, table_index)
+        if routed:
+            outcome = "fast_path"
+            logger.info("[%s] 🚦 Served from %s fast path", rid, routed["route"])
             return jsonify({
-                "answer": cached_answer,
-                "highlight": [],
+                "answer": routed["answer"],
+                "highlight": routed["highlight"],
             })
 
-        # Construct AI prompt
-        prompt = f"""
-You are an expert assistant helping explain telecom technical documentation to engineers and curious professionals.
-
-Strictly use only the information from the context below to answer the user's question. 
-Do not add external knowledge or make up content.
-
-Format your answer in a clean and structured way:
-- Use plain text for explanations.
-- Use bullet points or tables only when the content naturally fits that format (e.g., lists of features, differences, conditions).
-- Avoid redundant phrases or overuse of formatting.
-
----
-
-Question:
-{query_text}
-
----
+        # Questions a cache (warm or fuzzy) will likely answer only need the encode, so they
+        # queue ahead of LLM-bound ones; a wrong guess only changes the queue order
+        priority = PRIORITY_CHEAP if likely_cached(query_text) else PRIORITY_NORMAL
 
-Context:
-{full_context}
-"""
-
-        length_pref = detect_answer_length(query_text)
-
-        if length_pref == "short":
-            max_tokens = 150
-            style_note = "Respond briefly and to the point."
-        elif length_pref == "long":
-            max_tokens = 800
-            style_note = "Provide a detailed explanation with examples if needed."
-        else:
-            max_tokens = 400
-            style_note = "Keep your response concise but informative."
+        # Encode query; the embedding also lets near-identical concurrent questions share one answer
+        with encode_limiter.slot(priority), stage("encode", request_id=rid):
+            query_embedding = model.encode(query_text, convert_to_numpy=True, normalize_embeddings=True)
 
         try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": f"You are a helpful technical assistant. Only answer based on the provided context. Structure your response naturally using plain text, bullet points, or tables when appropriate. {style_note}"},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.4,
-                max_tokens=max_tokens
+            (result, outcome), shared = inflight.do(
+                normalize_query(query_text),
+                lambda: answer_query(query_text, query_embedding),
+                embedding=query_embedding,
             )
-            print("Full context:", full_context)
-            answer = response.choices[0].message.content.strip()
-            end_time = time.perf_counter()
-            print(f"⚡ Generated the answer searching therough the nodes in {end_time - start_time:.2f}")
-        except Exception as e:
-            print("❌ Error during OpenAI request:", e)
+        except CircuitOpenError as e:
+            outcome = "llm_circuit_open"
+            return circuit_open_response(e)
+        except LLMError:
+            outcome = "llm_error"
             return jsonify({"answer": "Sorry, the AI model failed to respond.", "highlight": []}), 500
-        
-        print("🔍 Final Answer Preview:\n", answer)
-        save_cache(query_text, answer)
 
-        return jsonify({
-            "answer": answer,
-            "highlight": highlights,
-        })
+        if shared:
+            outcome = "shared"
+            logger.info("[%s] 🔗 Shared an in-flight answer", rid)
+        return jsonify(result)
+
+    except Overloaded as e:
+        outcome = "rejected"
+        logger.warning("[%s] 🚧 Rejected: %s, retry after %ss", rid, e, e.retry_after)
+        return overloaded_response(e)
 
     except Exception as e:
-        print("Error processing query:", e)
+        logger.exception("[%s] Error processing query: %s", rid, e)
         return jsonify({"answer": "Server error occurred.", "highlight": []}), 500
 
+    finally:
+        elapsed = time.perf_counter() - start_time
+        g.outcome = outcome
+        record_request("query", outcome, elapsed)
+        logger.info("[%s] ⚡ /api/query %s in %.3fs", rid, outcome, elapsed)
+
+def overloaded_response(e):
+    response = jsonify({"answer": "The assistant is busy right now, please retry shortly.", "highlight": [], "stage": e.stage})
+    response.headers["Retry-After"] = str(e.retry_after)
+    return response, 503
+
+def circuit_open_response(e):
+    response = jsonify({"answer": "The AI model is unavailable right now, please retry shortly.", "highlight": [], "stage": "llm"})
+    response.headers["Retry-After"] = str(max(1, math.ceil(e.retry_after)))
+    return response, 503
+
+def generate_answer(query_text, top_node_id):
+    """
+    Context + LLM answer for one batch question (runs in batch_pool, outside the
+    request context). Bulk answers are not written to the interactive response
+    cache, so a large batch can't evict it or rewrite its file per answer.
+    """
+    full_context, highlights = build_context(G, top_node_id, query_text, table_rows=table_index.search(query_text))
+    messages, max_tokens = build_messages(query_text, full_context)
+    with llm_limiter.slot(PRIORITY_BULK):
+        answer = llm.complete(messages=messages, temperature=0.4, max_tokens=max_tokens)
+    return {"answer": answer, "highlight": highlights}
+
+@app.route("/api/query/batch", methods=["POST"])
+@requires_ready
+def query_batch():
+    """
+    Answers a list of questions, streamed back as NDJSON in completion order.
+    Each line is {"index", "query", "answer", "highlight", "outcome"}; the last
+    line is {"done": true, ...}. Questions are routed, encoded in one batch,
+    matched against the corpus and caches with one matrix product each, and
+    only distinct cache misses go to the LLM, BATCH_LLM_CONCURRENCY at a time.
+    """
+    start_time = time.perf_counter()
+    rid = g.request_id
+    data = request.get_json(force=True, silent=True) or {}
+    queries = data.get("queries")
+    if not isinstance(queries, list) or not all(isinstance(q, str) for q in queries):
+        return jsonify({"error": "Expected {\"queries\": [\"...\", ...]}."}), 400
+    if len(queries) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} queries per batch."}), 413
+
+    query_texts = [q.strip().lower() for q in queries]
+    ready = []    # (index, response, outcome) answered without the LLM
+    pending = {}  # normalized query -> [indexes] that still need an answer
+
+    with stage("route", request_id=rid):
+        for i, query_text in enumerate(query_texts):
+            if not query_text:
+                ready.append((i, {"answer": "Please enter a valid question.", "highlight": []}, "empty"))
+                continue
+            routed = route_query(query_text, G, route_indexes, table_index)
+            if routed:
+                ready.append((i, {"answer": routed["answer"], "highlight": routed["highlight"]}, "fast_path"))
+            else:
+                pending.setdefault(normalize_query(query_text), []).append(i)
+
+    jobs = []  # (normalized query, query text, top section)
+    if pending:
+        keys = list(pending)
+        texts = [query_texts[pending[key][0]] for key in keys]
+        try:
+            with encode_limiter.slot(PRIORITY_BULK), stage("encode", request_id=rid):
+                query_embeddings = model.encode(texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+            cache = load_cache()
+            cache_queries = list(cache)
+            cache_matrix = cached_query_embeddings(cache_queries, PRIORITY_BULK) if cache_queries else None
+        except Overloaded as e:
+            logger.warning("[%s] 🚧 Batch rejected: %s, retry after %ss", rid, e, e.retry_after)
+            return overloaded_response(e)
+        with stage("similarity", request_id=rid):
+            top_node_ids = top_sections(query_embeddings, corpus_embeddings, node_ids)
+
+        with stage("cache_lookup", request_id=rid):
+            cache_similarities = query_embeddings @ cache_matrix.T if cache_queries else None
+
+            for row, (key, query_text) in enumerate(zip(keys, texts)):
+                warm_hit = warm_cache.lookup(key, query_embeddings[row])
+                if warm_hit:
+                    _, entry, _ = warm_hit
+                    response, outcome = {"answer": entry["answer"], "highlight": entry.get("highlight", [])}, "warm_cache"
+                elif cache_similarities is not None and cache_similarities[row].max() >= 0.85:
+                    response, outcome = {"answer": cache[cache_queries[int(cache_similarities[row].argmax())]], "highlight": []}, "fuzzy_cache"
+                else:
+                    jobs.append((key, query_text, top_node_ids[row]))
+                    continue
+                ready.extend((i, response, outcome) for i in pending[key])
+
+    logger.info("[%s] 📦 Batch of %s: %s answered without the LLM, %s distinct LLM calls", rid, len(queries), len(ready), len(jobs))
+
+    def stream():
+        outcomes = Counter()
+
+        def line(i, response, outcome):
+            outcomes[outcome] += 1
+            record_request("query_batch", outcome, time.perf_counter() - start_time)
+            return json.dumps({"index": i, "query": queries[i], **response, "outcome": outcome}) + "\n"
+
+        for i, response, outcome in ready:
+            yield line(i, response, outcome)
+
+        futures = {batch_pool.submit(generate_answer, query_text, top_node_id): key for key, query_text, top_node_id in jobs}
+        try:
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    response, outcome = future.result(), "llm"
+                except CircuitOpenError as e:
+                    response, outcome = {"answer": "The AI model is unavailable right now, please retry shortly.", "highlight": [], "retry_after": max(1, math.ceil(e.retry_after))}, "llm_circuit_open"
+                except LLMError as e:
+                    logger.error("[%s] ❌ Batch LLM request failed: %s", rid, e)
+                    response, outcome = {"answer": "Sorry, the AI model failed to respond.", "highlight": []}, "llm_error"
+                except Overloaded as e:
+                    response, outcome = {"answer": "The assistant is busy right now, please retry shortly.", "highlight": [], "retry_after": e.retry_after}, "rejected"
+                except Exception as e:
+                    logger.exception("[%s] Error answering batch query: %s", rid, e)
+                    response, outcome = {"answer": "Server error occurred.", "highlight": []}, "error"
+                for n, i in enumerate(pending[key]):
+                    # Duplicates within the batch share the first one's answer
+                    yield line(i, response, outcome if n == 0 or outcome != "llm" else "shared")
+        finally:
+            # The client went away mid-stream (GeneratorExit): drop the LLM calls that haven't started
+            cancelled = sum(future.cancel() for future in futures)
+            if cancelled:
+                logger.info("[%s] 📦 Batch stream closed early; cancelled %s pending LLM calls", rid, cancelled)
+
+        elapsed = time.perf_counter() - start_time
+        logger.info("[%s] 📦 /api/query/batch of %s done in %.3fs", rid, len(queries), elapsed)
+        yield json.dumps({"done": True, "count": len(queries), "outcomes": dict(outcomes), "seconds": round(elapsed, 3)}) + "\n"
+
+    return Response(stream(), mimetype="application/x-ndjson")
+
+@app.route("/api/memory", methods=["GET"])
+def memory():
+    """Per-process memory; uss is what a worker does not share with the others (?all=1 for every worker)"""
+    if request.args.get("all"):
+        return jsonify(sibling_memory_report())
+    return jsonify(memory_report())
+
+@app.route("/api/impact", methods=["GET"])
+@requires_ready
+def impact():
+    start_time = time.perf_counter()
+    section_id = request.args.get("section", "").strip()
+    direction = request.args.get("direction", "downstream")
+
+    if not section_id or section_id not in G:
+        return jsonify({"error": f"Section {section_id!r} not found.", "impacted": [], "highlight": []}), 404
+    if direction not in ("downstream", "upstream"):
+        return jsonify({"error": "direction must be 'downstream' or 'upstream'.", "impacted": [], "highlight": []}), 400
+
+    try:
+        depth = int(request.args.get("depth", 2))
+    except ValueError:
+        return jsonify({"error": "depth must be an integer.", "impacted": [], "highlight": []}), 400
+
+    with stage("impact", request_id=g.request_id):
+        result = impact_index.impact(section_id, depth=depth, direction=direction)
+    elapsed = time.perf_counter() - start_time
+    record_request("impact", "ok", elapsed)
+    logger.info("[%s] 🧭 Impact of %s (%s, depth %s) in %.4fs", g.request_id, section_id, direction, result["depth"], elapsed)
+    return jsonify(result)
+
 # @app.route('/api/graph', methods=['GET'])
 # def get_graph():
 #     filepath = os.path.join(os.path.dirname(__file__), '..', 'data', 'unified_graph.pkl')
@@ -238,5 +568,15 @@ Context:
 #     }
 #     return jsonify(graph_data)
 
+if os.getenv("BACKEND_PRELOAD") == "1":
+    # gunicorn preload: load everything in the master before it binds and forks workers
+    startup.run(STARTUP_STAGES)
+elif __name__ != "__main__":
+    # Imported by a WSGI server (in each gunicorn worker, after the fork): load in the background
+    startup.run_in_background(STARTUP_STAGES)
+
 if __name__ == "__main__":
+    # With the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        startup.run_in_background(STARTUP_STAGES)
     app.run(debug=True, host="0.0.0.0", port=5000)
\ No newline at end of file
@@ -0,0 +1,51 @@
+# Multi-worker serving: gunicorn -c gunicorn.conf.py app:app
+#
+# For /metrics to aggregate all workers, point PROMETHEUS_MULTIPROC_DIR at an
+# empty directory before starting gunicorn.
+#
+# By default the master binds the socket and forks right away, and every
+# worker loads the graph, model and indexes in a background thread, so
+# /healthz and /readyz answer while loading. The corpus embeddings are
+# memory-mapped from data/corpus_embeddings.npy, so workers share those pages;
+# the graph and model are per-worker copies (~0.5 GiB USS per worker, mostly
+# torch and the model; see the README for measurements).
+#
+# BACKEND_PRELOAD=1 instead loads everything once in the master and workers
+# inherit it copy-on-write (~30 MiB USS per worker), but the socket is only
+# bound after loading, so nothing answers until the backend is ready.
+
+import os
+import sys
+
+# shared_index logs through shared.metrics, which lives in the project root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from shared_index import freeze_shared_state
+
+bind = os.getenv("BACKEND_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("BACKEND_WORKERS", "8"))
+worker_class = "gthread"
+threads = int(os.getenv("BACKEND_THREADS", "4"))
+timeout = 120
+# app.py reads the same variable to load synchronously at import (in the master)
+preload_app = os.getenv("BACKEND_PRELOAD") == "1"
+
+
+def when_ready(server):
+    # Runs in the master after binding, before the first fork
+    if preload_app:
+        freeze_shared_state()
+        server.log.info("Shared state frozen; forking %s workers", workers)
+
+
+def post_fork(server, worker):
+    # One intra-op thread per worker so 8+ workers don't oversubscribe the CPUs
+    import torch
+    torch.set_num_threads(int(os.getenv("TORCH_THREADS", "1")))
+
+
+def child_exit(server, worker):
+    # Drop a dead worker's samples when metrics are aggregated across workers
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -0,0 +1,64 @@
+from collections import deque
+from functools import lru_cache
+
+import networkx as nx
+
+from graph_builder.graphs.traversals import bounded_bfs
+
+MAX_IMPACT_DEPTH = 6
+
+
+class ImpactIndex:
+    """
+    Reachability index over the unified graph for impact analysis.
+    - "downstream": sections the given section mentions (same as downstream_impact)
+    - "upstream": sections that mention the given section, i.e. depend on it
+    The condensed DAGs are built up front (a backend startup stage);
+    bounded-depth results and total reachable counts are cached per node.
+    """
+
+    def __init__(self, G: nx.DiGraph):
+        self.G = G
+        self.graphs = {"downstream": G, "upstream": G.reverse(copy=False)}
+        # Strongly connected components collapsed into a DAG, per direction
+        self.condensed = {direction: nx.condensation(graph) for direction, graph in self.graphs.items()}
+        self.impacted = lru_cache(maxsize=4096)(self._impacted)
+        self.reachable_total = lru_cache(maxsize=4096)(self._reachable_total)
+
+    def _impacted(self, section_id, depth, direction):
+        """[(section_id, hops), ...] in hop order, from the shared bounded BFS"""
+        return tuple(bounded_bfs(self.graphs[direction], section_id, depth).items())
+
+    def _reachable_total(self, section_id, direction):
+        """Number of sections reachable at any depth, walking the condensed DAG"""
+        C = self.condensed[direction]
+        start = C.graph["mapping"][section_id]
+        seen = {start}
+        queue = deque([start])
+        while queue:
+            for succ in C.successors(queue.popleft()):
+                if succ not in seen:
+                    seen.add(succ)
+                    queue.append(succ)
+        return sum(len(C.nodes[c]["members"]) for c in seen) - 1
+
+    def impact(self, section_id, depth=2, direction="downstream"):
+        depth = max(1, min(int(depth), MAX_IMPACT_DEPTH))
+        impacted = []
+        for sid, hops in self.impacted(section_id, depth, direction):
+            data = self.G.nodes[sid]
+            impacted.append({
+                "section_id": sid,
+                "distance": hops,
+                "type": data.get("type", "unchanged"),
+                "title": data.get("title", ""),
+            })
+
+        return {
+            "section": section_id,
+            "direction": direction,
+            "depth": depth,
+            "impacted": impacted,
+            "reachable_total": self.reachable_total(section_id, direction),
+            "highlight": [section_id] + [entry["section_id"] for entry in impacted],
+        }
@@ -0,0 +1,124 @@
+import numpy as np
+
+from router import detect_change_types, format_diff
+from shared.tables import format_row
+
+NEIGHBOR_LIMIT = 4  # You can increase/decrease this as needed
+
+
+def detect_answer_length(query: str) -> str:
+    query = query.lower()
+    if any(kw in query for kw in ["in short", "briefly", "summary", "quickly", "short answer"]):
+        return "short"
+    elif any(kw in query for kw in ["in detail", "elaborate", "long answer", "full explanation", "explain thoroughly"]):
+        return "long"
+    else:
+        return "normal"
+
+
+def top_section(query_embedding, corpus_embeddings, node_ids):
+    """Best-matching section for a normalized query embedding (cosine = dot product)"""
+    similarities = corpus_embeddings @ query_embedding
+    return node_ids[int(np.argmax(similarities))]
+
+
+def top_sections(query_embeddings, corpus_embeddings, node_ids):
+    """Best-matching section for each row of a query embedding matrix, in one matrix product"""
+    similarities = query_embeddings @ corpus_embeddings.T
+    return [node_ids[int(i)] for i in np.argmax(similarities, axis=1)]
+
+
+def rank_sections(query_embedding, corpus_embeddings, node_ids, k=5):
+    """Top-k section IDs for a normalized query embedding, best first"""
+    similarities = corpus_embeddings @ query_embedding
+    k = min(k, len(node_ids))
+    top = np.argpartition(-similarities, k - 1)[:k]
+    return [node_ids[i] for i in top[np.argsort(-similarities[top])]]
+
+
+def build_context(G, top_node_id, query_text, neighbor_limit=NEIGHBOR_LIMIT, table_rows=None):
+    """
+    Returns (full_context, highlights): top node + limited neighbors, truncating
+    text, plus any table rows matched for the question (their section text
+    never carries the tables).
+    """
+    top_data = G.nodes[top_node_id]
+    highlights = [top_node_id]
+
+    # Questions that may be about changes also get the precomputed diff of modified
+    # sections, next to the text (a keyword match is no reason to drop the text)
+    asks_about_changes = bool(detect_change_types(query_text))
+
+    def format_section(nid):
+        data = G.nodes.get(nid, {})
+        title = data.get("title", nid)
+        text = data.get("text", "")
+        section = f"{title}:\n{text[:500]}..."  # truncate long texts
+        if asks_about_changes and data.get("type") == "modified" and data.get("diff"):
+            section += f"\nChanged sentences since the previous release:\n{format_diff(data['diff'])}"
+        return section
+
+    context_sections = [format_section(top_node_id)]
+    neighbors = top_data.get("neighbors", {})
+
+    neighbor_count = 0
+    for rel in ("parent", "siblings", "children"):
+        val = neighbors.get(rel)
+        if isinstance(val, list):
+            for nid in val:
+                if neighbor_count >= neighbor_limit:
+                    break
+                context_sections.append(format_section(nid))
+                highlights.append(nid)
+                neighbor_count += 1
+
+    if table_rows:
+        lines = [format_row(record, G.nodes.get(record["section_id"], {}).get("title")) for record in table_rows]
+        context_sections.append("Table rows:\n" + "\n".join(lines))
+        highlights.extend(sid for sid in dict.fromkeys(r["section_id"] for r in table_rows) if sid in G and sid not in highlights)
+
+    return "\n\n".join(context_sections), highlights
+
+
+def build_messages(query_text, full_context):
+    """Returns (messages, max_tokens) for the chat completion"""
+    # Construct AI prompt
+    prompt = f"""
+You are an expert assistant helping explain telecom technical documentation to engineers and curious professionals.
+
+Strictly use only the information from the context below to answer the user's question.
+Do not add external knowledge or make up content.
+
+Format your answer in a clean and structured way:
+- Use plain text for explanations.
+- Use bullet points or tables only when the content naturally fits that format (e.g., lists of features, differences, conditions).
+- Avoid redundant phrases or overuse of formatting.
+
+---
+
+Question:
+{query_text}
+
+---
+
+Context:
+{full_context}
+"""
+
+    length_pref = detect_answer_length(query_text)
+
+    if length_pref == "short":
+        max_tokens = 150
+        style_note = "Respond briefly and to the point."
+    elif length_pref == "long":
+        max_tokens = 800
+        style_note = "Provide a detailed explanation with examples if needed."
+    else:
+        max_tokens = 400
+        style_note = "Keep your response concise but informative."
+
+    messages = [
+        {"role": "system", "content": f"You are a helpful technical assistant. Only answer based on the provided context. Structure your response naturally using plain text, bullet points, or tables when appropriate. {style_note}"},
+        {"role": "user", "content": prompt}
+    ]
+    return messages, max_tokens
@@ -0,0 +1,302 @@
+import re
+from collections import defaultdict
+
+from shared.tables import format_row, IEI_QUERY_RE, CAUSE_QUERY_RE
+
+CHANGE_KEYWORDS = {
+    "added": ["added", "new", "introduced", "inserted"],
+    "removed": ["removed", "deleted", "dropped"],
+    "modified": ["modified", "updated", "revised"],
+    "moved": ["moved", "renumbered", "relocated"],
+}
+GENERIC_CHANGE_KEYWORDS = ["changed", "changes", "differences"]
+CHANGE_TYPES = ["added", "removed", "modified", "moved"]
+
+SHOW_PATTERN = re.compile(r"^(?:please\s+)?(?:show|display|open|view|go to|get|print)(?:\s+me)?\s+(?:the\s+)?(?:text\s+of\s+)?(?:section|clause)?\s*(\d+(?:\.\d+)*)\s*[?.!]?$")
+BARE_SECTION_PATTERN = re.compile(r"^(?:section|clause)?\s*(\d+(?:\.\d+)+)\s*[?.!]?$")
+
+# Change listings are only answered from the index when the whole question is a
+# listing request with the change verb as its predicate; anything with more to it
+# ("which new timers were introduced for 5g?") goes to retrieval
+_CHANGE_VERB = r"(?P<verb>" + "|".join(kw for t in CHANGE_TYPES for kw in CHANGE_KEYWORDS[t]) + "|changed)"
+_SECTION_NOUN = r"(?:sub)?(?:sections?|clauses?)"
+_BE = r"(?:is|are|was|were|has\s+been|have\s+been|got)"
+_SCOPE = r"(?:\s+(?:in|under|within|of)\s+(?:the\s+)?(?:chapter|clause|section)?\s*(?P<scope>\d+(?:\.\d+)*))?"
+_END = r"\s*[?.!]?$"
+LIST_PATTERNS = [
+    # "list added sections", "show all new clauses under 9.9", "list the changes in chapter 8"
+    re.compile(
+        r"^(?:please\s+)?(?:list|show|display|give|get)(?:\s+me)?(?:\s+(?:all|the|every))*"
+        rf"(?:\s+{_CHANGE_VERB})?\s+(?:{_SECTION_NOUN}|(?P<noun>changes|differences))"
+        rf"(?:\s+(?:that|which)\s+{_BE})?(?:\s+{_CHANGE_VERB.replace('verb', 'verb2')})?{_SCOPE}{_END}"
+    ),
+    # "which sections were removed in chapter 9", "what clauses are new under 5.3"
+    re.compile(rf"^(?:which|what)\s+{_SECTION_NOUN}\s+{_BE}\s+{_CHANGE_VERB}{_SCOPE}{_END}"),
+    # "what was added in chapter 8", "what changed in 4"
+    re.compile(rf"^what(?:\s+{_BE})?\s+{_CHANGE_VERB}{_SCOPE}{_END}"),
+]
+
+# The stored diff of one section is only returned for an explicit diff request
+_SECTION_REF = r"(?:the\s+)?(?:section\s+|clause\s+)?(?P<sid>\d+(?:\.\d+)+)"
+DIFF_PATTERNS = [
+    # "what changed in 5.5.1.2", "what has changed in section 9.9.3", "what are the changes to 5.5.1"
+    re.compile(rf"^what(?:\s+(?:has|have))?\s+(?:changed|(?:are|were)\s+the\s+(?:changes|differences))\s+(?:in|to|of)\s+{_SECTION_REF}{_END}"),
+    # "diff of 5.5.1.2", "show the diff for clause 9.9.3"
+    re.compile(rf"^(?:(?:please\s+)?(?:show|give|get)(?:\s+me)?\s+)?(?:the\s+)?diff\s+(?:of|for)\s+{_SECTION_REF}{_END}"),
+    # "how did 5.5.1.2 change?", "how has section 9.9.3 changed"
+    re.compile(rf"^how\s+(?:did|has)\s+{_SECTION_REF}\s+changed?{_END}"),
+]
+
+# Table rows are only returned as the answer when the question is nothing but the
+# lookup; "what does the ue do on receiving cause #11?" goes to retrieval, which
+# adds the matching rows to the context
+TABLE_LOOKUP_PATTERN = re.compile(
+    r"^(?:please\s+)?(?:(?:what\s+(?:is|are|does)|explain|define|look\s*up|show(?:\s+me)?)\s+)?(?:the\s+)?"
+    r"(?:(?:emm|esm|5gmm|5gsm)\s+)?(?P<key>(?:iei|cause)\b.*?)"
+    r"(?:\s+(?:mean|stand\s+for))?\s*[?.!]?$"
+)
+
+MAX_LISTED_SECTIONS = 50
+MAX_DIFF_ENTRIES = 20
+MAX_HIGHLIGHTS = 200
+MAX_TABLE_ROWS = 20
+
+
+def section_sort_key(sid):
+    """Natural sort for dotted IDs, so 5.10 comes after 5.9"""
+    return [int(p) if p.isdigit() else p for p in str(sid).split(".")]
+
+
+def _has_keyword(query, keywords):
+    return any(re.search(rf"\b{re.escape(kw)}\b", query) for kw in keywords)
+
+
+def build_route_indexes(G):
+    """
+    Precomputes lookup tables for the structural fast paths:
+    - by_scope: (ancestor prefix, change type) -> sorted section IDs under that prefix
+    - by_type: change type -> sorted section IDs across the whole spec
+    """
+    by_scope = defaultdict(list)
+    by_type = defaultdict(list)
+
+    for node_id, attr in G.nodes(data=True):
+        change_type = attr.get("type")
+        if not change_type or change_type == "unchanged":
+            continue
+
+        sid = str(node_id)
+        by_type[change_type].append(sid)
+
+        parts = sid.split(".")
+        for depth in range(1, len(parts) + 1):
+            by_scope[(".".join(parts[:depth]), change_type)].append(sid)
+
+    for sids in by_scope.values():
+        sids.sort(key=section_sort_key)
+    for sids in by_type.values():
+        sids.sort(key=section_sort_key)
+
+    return {"by_scope": dict(by_scope), "by_type": dict(by_type)}
+
+
+def detect_change_types(query: str):
+    types = [t for t in CHANGE_TYPES if _has_keyword(query, CHANGE_KEYWORDS[t])]
+    if not types and _has_keyword(query, GENERIC_CHANGE_KEYWORDS):
+        types = list(CHANGE_TYPES)
+    return types
+
+
+def parse_listing(query: str):
+    """(change types, scope) for a pure change-listing request, else None"""
+    for pattern in LIST_PATTERNS:
+        match = pattern.match(query)
+        if not match:
+            continue
+        groups = match.groupdict()
+        verbs = [groups.get("verb"), groups.get("verb2")]
+        types = [t for t in CHANGE_TYPES if any(v in CHANGE_KEYWORDS[t] for v in verbs if v)]
+        if not types:
+            if not ("changed" in verbs or groups.get("noun")):
+                continue  # "list all sections" is not about changes
+            types = list(CHANGE_TYPES)
+        return types, groups.get("scope")
+    return None
+
+
+def format_section_answer(G, sid):
+    data = G.nodes[sid]
+    title = data.get("title") or ""
+    change_type = data.get("type", "unchanged")
+    text = data.get("text") or ""
+
+    lines = [f"Section {sid}" + (f" – {title}" if title else "") + f" ({change_type})", ""]
+    lines.append(text)
+    return "\n".join(lines).strip()
+
+
+def route_section(G, sid):
+    if sid not in G.nodes:
+        return None
+    data = G.nodes[sid]
+    if not data.get("text"):
+        return None  # Referenced-only node, nothing to show
+
+    return {
+        "answer": format_section_answer(G, sid),
+        "highlight": [sid],
+        "route": "section",
+    }
+
+
+def format_diff(diff, max_entries=MAX_DIFF_ENTRIES):
+    """Renders a precomputed sentence diff as +/-/~ lines"""
+    lines = []
+    for entry in diff[:max_entries]:
+        if entry["op"] == "insert":
+            lines.extend(f"+ {s}" for s in entry["new"])
+        elif entry["op"] == "delete":
+            lines.extend(f"- {s}" for s in entry["old"])
+        else:
+            lines.extend(f"~ was: {s}" for s in entry["old"])
+            lines.extend(f"~ now: {s}" for s in entry["new"])
+    if len(diff) > max_entries:
+        lines.append(f"... and {len(diff) - max_entries} more changed spans")
+    return "\n".join(lines)
+
+
+def route_section_changes(G, sid):
+    if sid not in G.nodes:
+        return None
+    data = G.nodes[sid]
+    change_type = data.get("type")
+    title = data.get("title") or ""
+    heading = f"Section {sid}" + (f" – {title}" if title else "")
+
+    if change_type == "modified" and data.get("diff") is not None:
+        similarity = data.get("similarity")
+        lines = [f"{heading} was modified" + (f" (similarity {similarity})" if similarity is not None else "") + ":", ""]
+        lines.append(format_diff(data["diff"]) or "Only whitespace or formatting changed.")
+    elif change_type == "moved":
+        lines = [f"{heading} was moved from {data.get('old_section_id')}" + (f" (similarity {data.get('similarity')})" if data.get("similarity") is not None else "") + ":", ""]
+        lines.append(format_diff(data.get("diff") or []) or "The content is unchanged apart from the new number.")
+    elif change_type in ("added", "removed"):
+        lines = [f"{heading} was {change_type} in the new release:", "", data.get("text") or ""]
+    elif change_type == "unchanged":
+        lines = [f"{heading} is unchanged between the two releases."]
+    else:
+        return None
+
+    return {
+        "answer": "\n".join(lines).strip(),
+        "highlight": [sid],
+        "route": "diff",
+    }
+
+
+def route_changes(G, indexes, change_types, scope):
+    sids = []
+    for change_type in change_types:
+        if scope:
+            sids.extend(indexes["by_scope"].get((scope, change_type), []))
+        else:
+            sids.extend(indexes["by_type"].get(change_type, []))
+    sids.sort(key=section_sort_key)
+
+    where = f"under {scope}" if scope else "in the specification"
+    label = " / ".join(change_types)
+
+    if not sids:
+        return {
+            "answer": f"No {label} sections found {where}.",
+            "highlight": [],
+            "route": "changes",
+        }
+
+    lines = [f"{len(sids)} {label} section(s) {where}:", ""]
+    for sid in sids[:MAX_LISTED_SECTIONS]:
+        data = G.nodes[sid]
+        title = data.get("title") or ""
+        lines.append(f"- {sid} ({data.get('type')})" + (f": {title}" if title else ""))
+    if len(sids) > MAX_LISTED_SECTIONS:
+        lines.append(f"... and {len(sids) - MAX_LISTED_SECTIONS} more")
+
+    return {
+        "answer": "\n".join(lines),
+        "highlight": sids[:MAX_HIGHLIGHTS],
+        "route": "changes",
+    }
+
+
+def parse_table_lookup(query: str):
+    """The "iei 5a" / "cause #11" part of a pure table lookup, else None"""
+    match = TABLE_LOOKUP_PATTERN.match(query)
+    if not match:
+        return None
+    key = match.group("key")
+    if IEI_QUERY_RE.fullmatch(key) or CAUSE_QUERY_RE.fullmatch(key):
+        return key
+    return None
+
+
+def route_table(G, table_index, query):
+    """Pure IEI / cause value lookups answered from the table store's key index"""
+    key = parse_table_lookup(query)
+    if not key:
+        return None
+    keyed = table_index.keyed_lookup(key)
+    if not keyed:
+        return None
+    label, rows = keyed
+
+    lines = [f"{label} appears in {len(rows)} table row(s):", ""]
+    for record in rows[:MAX_TABLE_ROWS]:
+        title = G.nodes[record["section_id"]].get("title") if record["section_id"] in G else None
+        lines.append(f"- {format_row(record, title)}")
+    if len(rows) > MAX_TABLE_ROWS:
+        lines.append(f"... and {len(rows) - MAX_TABLE_ROWS} more")
+
+    return {
+        "answer": "\n".join(lines),
+        "highlight": list(dict.fromkeys(r["section_id"] for r in rows if r["section_id"] in G))[:MAX_HIGHLIGHTS],
+        "route": "table",
+    }
+
+
+def route_query(query_text: str, G, indexes, table_index=None):
+    """
+    Answers purely structural questions straight from the graph indexes
+    (and IEI / cause lookups from the table store, when given).
+    Returns a response dict, or None when the question needs retrieval + GPT.
+    """
+    query = query_text.strip().lower()
+
+    # "show section 5.5.1.2", "5.5.1.2", "clause 9.9.3"
+    match = SHOW_PATTERN.match(query) or BARE_SECTION_PATTERN.match(query)
+    if match:
+        return route_section(G, match.group(1))
+
+    # "what is IEI 5A", "emm cause #11", "what does cause value 22 mean"
+    if table_index is not None:
+        routed = route_table(G, table_index, query)
+        if routed:
+            return routed
+
+    # "what changed in 5.5.1.2", "diff of clause 9.9.3"
+    for pattern in DIFF_PATTERNS:
+        match = pattern.match(query)
+        if match:
+            sid = match.group("sid")
+            routed = route_section_changes(G, sid)
+            # An unchanged (or diff-less) heading answers for its subsections' changes
+            if routed is None or G.nodes[sid].get("type") == "unchanged":
+                if any(indexes["by_scope"].get((sid, t)) for t in CHANGE_TYPES):
+                    return route_changes(G, indexes, list(CHANGE_TYPES), sid)
+            return routed
+
+    # "what was added in chapter 8", "list removed sections under 9.9.3"
+    listing = parse_listing(query)
+    if listing:
+        return route_changes(G, indexes, *listing)
+
+    return None
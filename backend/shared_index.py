@@ -0,0 +1,137 @@
+import gc
+import json
+import os
+
+import numpy as np
+
+from shared.metrics import logger
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process dev server only
+    fcntl = None
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+EMBEDDINGS_PATH = os.path.join(DATA_DIR, "corpus_embeddings.npy")
+EMBEDDINGS_META_PATH = os.path.join(DATA_DIR, "corpus_embeddings.json")
+EMBEDDINGS_LOCK_PATH = os.path.join(DATA_DIR, "corpus_embeddings.lock")
+
+
+def build_corpus(G):
+    """Returns (node_ids, corpus) with one "title. text" document per non-empty node"""
+    node_ids = []
+    corpus = []
+
+    for node_id, attr in G.nodes(data=True):
+        text = attr.get("text") or ""
+        title = attr.get("title") or ""
+        if not isinstance(text, str):
+            text = str(text)
+        if not isinstance(title, str):
+            title = str(title)
+
+        combined = f"{title}. {text}".strip()
+        if combined:
+            corpus.append(combined)
+            node_ids.append(node_id)
+
+    return node_ids, corpus
+
+
+def graph_fingerprint(graph_path, model_name):
+    stat = os.stat(graph_path)
+    return {"graph_size": stat.st_size, "graph_mtime": stat.st_mtime, "model": model_name}
+
+
+def load_or_build_embeddings(model, model_name, corpus, node_ids, graph_path):
+    """
+    Returns L2-normalized float32 corpus embeddings as a read-only memory map.
+
+    The matrix is encoded once per graph/model and stored as .npy next to the
+    graph; every process that maps it shares the same page-cache pages, so
+    N workers hold one copy instead of N.
+    """
+    fingerprint = graph_fingerprint(graph_path, model_name)
+    node_id_list = [str(n) for n in node_ids]
+
+    # Workers starting together take turns: the first one encodes, the rest map its file
+    with open(EMBEDDINGS_LOCK_PATH, "w") as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+
+        if os.path.exists(EMBEDDINGS_PATH) and os.path.exists(EMBEDDINGS_META_PATH):
+            with open(EMBEDDINGS_META_PATH, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if meta.get("fingerprint") == fingerprint and meta.get("node_ids") == node_id_list:
+                logger.info("📂 Mapping cached corpus embeddings")
+                return np.load(EMBEDDINGS_PATH, mmap_mode="r")
+
+        logger.info("🧮 Encoding %d sections", len(corpus))
+        embeddings = model.encode(corpus, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+        tmp_path = EMBEDDINGS_PATH + ".tmp.npy"
+        np.save(tmp_path, embeddings)
+        os.replace(tmp_path, EMBEDDINGS_PATH)
+        tmp_meta_path = EMBEDDINGS_META_PATH + ".tmp"
+        with open(tmp_meta_path, "w", encoding="utf-8") as f:
+            json.dump({"fingerprint": fingerprint, "node_ids": node_id_list}, f)
+        os.replace(tmp_meta_path, EMBEDDINGS_META_PATH)
+
+        return np.load(EMBEDDINGS_PATH, mmap_mode="r")
+
+
+def freeze_shared_state():
+    """
+    Moves everything allocated so far into the GC's permanent generation so
+    collections in forked workers don't touch (and copy) the shared pages.
+    Call once in the master, right before forking workers (preload mode).
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def memory_report(pid=None):
+    """
+    Memory of a process (default: the current one) from /proc/<pid>/smaps_rollup
+    (Linux), in MB. uss = pages only this process holds; pss = rss with shared
+    pages split between the processes sharing them.
+    """
+    pid = pid or os.getpid()
+    fields = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) >= 3 and parts[0].endswith(":"):
+                    fields[parts[0][:-1]] = int(parts[1])  # kB
+    except OSError:
+        return {"pid": pid, "error": "smaps_rollup not available"}
+
+    def mb(*keys):
+        return round(sum(fields.get(k, 0) for k in keys) / 1024, 1)
+
+    return {
+        "pid": pid,
+        "rss_mb": mb("Rss"),
+        "pss_mb": mb("Pss"),
+        "uss_mb": mb("Private_Clean", "Private_Dirty"),
+        "shared_mb": mb("Shared_Clean", "Shared_Dirty"),
+    }
+
+
+def sibling_memory_report():
+    """Reports every child of this process's parent, i.e. all workers of a gunicorn master"""
+    ppid = os.getppid()
+    try:
+        with open(f"/proc/{ppid}/task/{ppid}/children", "r") as f:
+            pids = [int(p) for p in f.read().split()]
+    except OSError:
+        pids = [os.getpid()]
+
+    workers = [memory_report(pid) for pid in pids]
+    return {
+        "master_pid": ppid,
+        "workers": workers,
+        "total_uss_mb": round(sum(w.get("uss_mb", 0) for w in workers), 1),
+        "total_pss_mb": round(sum(w.get("pss_mb", 0) for w in workers), 1),
+    }
@@ -0,0 +1,93 @@
+import re
+import threading
+
+import numpy as np
+
+from shared.metrics import logger, SINGLEFLIGHT_INFLIGHT
+
+
+SIGNATURE_STOPWORDS = {"a", "an", "the", "is", "are", "what", "whats", "what's", "does", "do", "of", "in", "for", "to", "please", "me"}
+
+
+def normalize_query(query_text):
+    """Lowercase, collapse whitespace and drop trailing punctuation"""
+    return re.sub(r"[\s?.!]+$", "", " ".join(query_text.lower().split()))
+
+
+def query_signature(query_text):
+    """Word-order and stopword insensitive key, so near-identical phrasings of a question share it"""
+    words = re.findall(r"[a-z0-9'][a-z0-9.'\-]*", query_text.lower())
+    return " ".join(sorted({w.rstrip(".") for w in words} - SIGNATURE_STOPWORDS))
+
+
+class _Call:
+    def __init__(self, key, embedding):
+        self.key = key
+        self.embedding = embedding
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical work: the first caller for a key runs `fn`,
+    callers arriving while it is in flight wait and receive the same result
+    (or exception). A caller also joins an in-flight call whose query
+    embedding is at least `threshold` similar, mirroring the fuzzy cache.
+    """
+
+    def __init__(self, threshold=0.85, wait_timeout=120):
+        self.threshold = threshold
+        self.wait_timeout = wait_timeout
+        self._lock = threading.Lock()
+        self._inflight = {}
+
+    def _find_similar(self, embedding):
+        if embedding is None:
+            return None
+        best, best_score = None, self.threshold
+        for call in self._inflight.values():
+            if call.embedding is None:
+                continue
+            score = float(np.dot(call.embedding, embedding))
+            if score >= best_score:
+                best, best_score = call, score
+        return best
+
+    def do(self, key, fn, embedding=None):
+        """Returns (result, shared) where shared is True if another request computed it"""
+        with self._lock:
+            call = self._inflight.get(key) or self._find_similar(embedding)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call(key, embedding)
+                self._inflight[key] = call
+                SINGLEFLIGHT_INFLIGHT.set(len(self._inflight))
+                leader = True
+
+        if not leader:
+            if not call.done.wait(self.wait_timeout):
+                raise TimeoutError(f"Timed out waiting for in-flight answer to {call.key!r}")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+                SINGLEFLIGHT_INFLIGHT.set(len(self._inflight))
+            call.done.set()
+            if call.waiters:
+                logger.info("🔗 %s concurrent request(s) shared the answer to '%s'", call.waiters, key)
+
+        return call.result, False
+
@@ -0,0 +1,60 @@
+import threading
+import time
+from collections import OrderedDict
+
+from shared.metrics import logger
+
+
+class StartupTracker:
+    """
+    Runs the backend's loading stages in order and records the status and
+    duration of each, for the liveness/readiness endpoints.
+    """
+
+    def __init__(self, stage_names):
+        self.started_at = time.time()
+        self.stages = OrderedDict((name, {"status": "pending", "seconds": None}) for name in stage_names)
+        self.ready = False
+        self.error = None
+        self._lock = threading.Lock()
+
+    def run(self, stages):
+        """`stages` is a list of (name, fn); stops at the first failure"""
+        for name, fn in stages:
+            with self._lock:
+                self.stages[name]["status"] = "running"
+            start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                with self._lock:
+                    self.stages[name]["status"] = "failed"
+                    self.stages[name]["seconds"] = round(time.perf_counter() - start, 3)
+                    self.error = f"{name}: {e}"
+                logger.exception("❌ Startup stage '%s' failed: %s", name, e)
+                return False
+
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.stages[name]["status"] = "done"
+                self.stages[name]["seconds"] = round(elapsed, 3)
+            logger.info("✅ Startup stage '%s' done in %.2fs", name, elapsed)
+
+        with self._lock:
+            self.ready = True
+        logger.info("🚀 Backend ready in %.2fs", time.time() - self.started_at)
+        return True
+
+    def run_in_background(self, stages):
+        thread = threading.Thread(target=self.run, args=(stages,), name="backend-startup", daemon=True)
+        thread.start()
+        return thread
+
+    def report(self):
+        with self._lock:
+            return {
+                "ready": self.ready,
+                "error": self.error,
+                "uptime_seconds": round(time.time() - self.started_at, 3),
+                "stages": {name: dict(info) for name, info in self.stages.items()},
+            }
@@ -0,0 +1,67 @@
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from admission import Overloaded, StageLimiter, PRIORITY_CHEAP, PRIORITY_NORMAL
+
+
+def wait_for(condition):
+    while not condition():
+        time.sleep(0.01)
+
+
+def queue_waiters(limiter, priority, count, outcomes):
+    def wait():
+        try:
+            with limiter.slot(priority):
+                outcomes.append(("ran", priority))
+        except Overloaded as e:
+            outcomes.append((e.reason, priority))
+
+    threads = [threading.Thread(target=wait) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    wait_for(lambda: limiter.stats()["queued"] >= count)
+    return threads
+
+
+def test_full_queue_sheds_a_worse_waiter_for_a_cheap_arrival():
+    limiter = StageLimiter("test", limit=1, max_queue=3, max_wait=5)
+    outcomes = []
+    limiter.acquire(PRIORITY_NORMAL)
+    threads = queue_waiters(limiter, PRIORITY_NORMAL, 3, outcomes)
+
+    cheap = queue_waiters(limiter, PRIORITY_CHEAP, 1, outcomes)
+    wait_for(lambda: outcomes)  # the shed waiter reports first
+    assert outcomes == [("queue_full", PRIORITY_NORMAL)]
+    assert limiter.stats()["queued"] == 3
+
+    limiter.release()
+    for thread in threads + cheap:
+        thread.join()
+    assert outcomes[0] == ("queue_full", PRIORITY_NORMAL)
+    assert outcomes[1] == ("ran", PRIORITY_CHEAP)
+    assert outcomes.count(("ran", PRIORITY_NORMAL)) == 2
+
+
+def test_full_queue_rejects_an_arrival_no_better_than_the_waiters():
+    limiter = StageLimiter("test", limit=1, max_queue=2, max_wait=5)
+    outcomes = []
+    limiter.acquire(PRIORITY_CHEAP)
+    threads = queue_waiters(limiter, PRIORITY_CHEAP, 2, outcomes)
+
+    with pytest.raises(Overloaded):
+        limiter.acquire(PRIORITY_NORMAL)
+    with pytest.raises(Overloaded):
+        limiter.acquire(PRIORITY_CHEAP)
+
+    limiter.release()
+    for thread in threads:
+        thread.join()
+    assert outcomes == [("ran", PRIORITY_CHEAP)] * 2
@@ -0,0 +1,21 @@
+import os
+import sys
+
+import networkx as nx
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from retrieval import build_context
+
+
+def test_change_keywords_keep_the_section_text():
+    G = nx.DiGraph()
+    G.add_node("6.4.4", title="Bearer context deactivation", type="modified",
+               text="The bearer context is deleted when the network sends DEACTIVATE EPS BEARER CONTEXT REQUEST.",
+               diff=[{"op": "insert", "new": ["The UE shall stop timer T3396."]}])
+
+    context, highlights = build_context(G, "6.4.4", "what happens when the bearer context is deleted?")
+    assert "DEACTIVATE EPS BEARER CONTEXT REQUEST" in context
+    assert "+ The UE shall stop timer T3396." in context
+    assert highlights == ["6.4.4"]
@@ -0,0 +1,136 @@
+import os
+import sys
+
+import networkx as nx
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from router import build_route_indexes, route_query
+from shared.tables import build_table_store, TableIndex
+
+
+@pytest.fixture
+def graph():
+    G = nx.DiGraph()
+    G.add_node("5", title="EMM procedures", text="General.", type="unchanged")
+    G.add_node("5.5", title="Attach and detach", text="Overview.", type="unchanged")
+    G.add_node("5.5.1", title="Attach procedure", text="The UE initiates the attach procedure.", type="modified",
+               similarity=0.91, diff=[{"op": "insert", "new": ["The UE shall include the new GUTI."]}])
+    G.add_node("5.5.1.2", title="Attach for EPS services", text="The UE sends ATTACH REQUEST.", type="unchanged")
+    G.add_node("5.5.3", title="5G interworking timers", text="Timer T3512 is introduced.", type="added")
+    G.add_node("8.2.4", title="Detach request", text="Old detach text.", type="removed")
+    G.add_node("9.9.3", title="EMM cause", text="Cause values.", type="moved", old_section_id="9.9.2")
+    return G
+
+
+@pytest.fixture
+def table_index():
+    return TableIndex(build_table_store({
+        "9.9.3": {"tables": [{"rows": [
+            ["Cause value", "Meaning"],
+            ["#11", "PLMN not allowed"],
+            ["#22", "Congestion"],
+        ]}]},
+        "5.5.1": {"tables": [{"rows": [
+            ["IEI", "Information Element", "Presence"],
+            ["5A", "Old P-TMSI signature", "O"],
+        ]}]},
+    }))
+
+
+def route(G, query, table_index=None):
+    return route_query(query, G, build_route_indexes(G), table_index)
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("list added sections", ["5.5.3"]),
+    ("show all new clauses under 5", ["5.5.3"]),
+    ("list removed sections in chapter 8", ["8.2.4"]),
+    ("which sections were removed?", ["8.2.4"]),
+    ("what was added in chapter 5", ["5.5.3"]),
+    ("what changed in 5", ["5.5.1", "5.5.3"]),
+    ("list the changes in chapter 9", ["9.9.3"]),
+])
+def test_listing_requests_take_the_fast_path(graph, query, expected):
+    routed = route(graph, query)
+    assert routed["route"] == "changes"
+    assert routed["highlight"] == expected
+
+
+@pytest.mark.parametrize("query", [
+    "which new timers were introduced for 5g?",
+    "which changes affect the attach procedure?",
+    "is the pdn connection removed when all bearers are deleted?",
+    "what new procedures does the ue support?",
+    "list all sections",
+    "how are sections renumbered between releases?",
+])
+def test_semantic_questions_go_to_retrieval(graph, query):
+    assert route(graph, query) is None
+
+
+@pytest.mark.parametrize("query", [
+    "what changed in 5.5.1",
+    "what has changed in section 5.5.1?",
+    "diff of clause 5.5.1",
+    "how did 5.5.1 change?",
+])
+def test_explicit_diff_requests_return_the_stored_diff(graph, query):
+    routed = route(graph, query)
+    assert routed["route"] == "diff"
+    assert "+ The UE shall include the new GUTI." in routed["answer"]
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("what changed in 5.5", ["5.5.1", "5.5.3"]),
+    ("diff of section 9.9", ["9.9.3"]),
+])
+def test_diff_of_an_unchanged_heading_lists_its_changed_subsections(graph, query, expected):
+    routed = route(graph, query)
+    assert routed["route"] == "changes"
+    assert routed["highlight"] == expected
+
+
+def test_diff_of_an_unchanged_leaf_says_so(graph):
+    routed = route(graph, "what changed in 5.5.1.2")
+    assert routed["route"] == "diff"
+    assert "unchanged" in routed["answer"]
+
+
+@pytest.mark.parametrize("query", [
+    "how does the ue handle a new guti in 5.5.1?",
+    "what is removed from the attach request in 5.5.1.2?",
+    "explain the changes to timer handling in 5.5.3",
+])
+def test_questions_mentioning_a_section_go_to_retrieval(graph, query):
+    assert route(graph, query) is None
+
+
+def test_section_lookup(graph):
+    assert route(graph, "show section 5.5.1.2")["highlight"] == ["5.5.1.2"]
+    assert route(graph, "9.9.3")["route"] == "section"
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("emm cause #11", "PLMN not allowed"),
+    ("what is cause #11?", "PLMN not allowed"),
+    ("what does cause value 22 mean?", "Congestion"),
+    ("iei 5a", "Old P-TMSI signature"),
+    ("what is the IEI 5A", "Old P-TMSI signature"),
+])
+def test_pure_table_lookups_take_the_fast_path(graph, table_index, query, expected):
+    routed = route(graph, query, table_index)
+    assert routed["route"] == "table"
+    assert expected in routed["answer"]
+
+
+@pytest.mark.parametrize("query", [
+    "what does the ue do on receiving cause #11 in attach reject?",
+    "when is cause #22 sent?",
+    "is iei 5a included in the attach request?",
+    "cause #99",
+])
+def test_questions_mentioning_a_table_key_go_to_retrieval(graph, table_index, query):
+    assert route(graph, query, table_index) is None
@@ -0,0 +1,76 @@
+import json
+import os
+
+import numpy as np
+
+from singleflight import query_signature
+
+WARM_CACHE_PATH = os.path.join(os.path.dirname(__file__), "cache_warm_responses.json")
+WARM_EMBEDDINGS_PATH = os.path.join(os.path.dirname(__file__), "cache_warm_embeddings.npy")
+
+
+def save_warm_cache(entries, embeddings):
+    """
+    entries: {query: {"answer": ..., "highlight": [...]}}, in the same order as
+    the rows of `embeddings` (L2-normalized query embeddings).
+    """
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    if len(entries) != len(embeddings):
+        raise ValueError(f"{len(entries)} entries but {len(embeddings)} embeddings")
+
+    # Write-then-rename each file; WarmCache.load ignores a pair that is out of sync
+    tmp_embeddings_path = WARM_EMBEDDINGS_PATH + ".tmp.npy"
+    np.save(tmp_embeddings_path, embeddings)
+    tmp_cache_path = WARM_CACHE_PATH + ".tmp"
+    with open(tmp_cache_path, "w", encoding="utf-8") as f:
+        json.dump(entries, f, indent=2)
+    os.replace(tmp_embeddings_path, WARM_EMBEDDINGS_PATH)
+    os.replace(tmp_cache_path, WARM_CACHE_PATH)
+
+
+class WarmCache:
+    """
+    Pre-generated answers (see graph_builder/pregenerate_answers.py) with their
+    query embeddings, loaded once. Unlike the LRU response cache it is not
+    trimmed and needs no encoding at lookup time beyond the query itself.
+    """
+
+    def __init__(self):
+        self.queries = []
+        self.entries = {}
+        self.signatures = set()  # query_signature of every entry, to predict hits before encoding
+        self.embeddings = np.zeros((0, 0), dtype=np.float32)
+
+    @classmethod
+    def load(cls):
+        cache = cls()
+        if os.path.exists(WARM_CACHE_PATH) and os.path.exists(WARM_EMBEDDINGS_PATH):
+            with open(WARM_CACHE_PATH, "r", encoding="utf-8") as f:
+                cache.entries = json.load(f)
+            cache.queries = list(cache.entries)
+            cache.signatures = {query_signature(q) for q in cache.queries}
+            # Read into memory, not memory-mapped: an open map keeps the file locked on
+            # Windows, so pregenerate_answers.py could not replace it under a running backend
+            cache.embeddings = np.load(WARM_EMBEDDINGS_PATH)
+            if len(cache.queries) != len(cache.embeddings):
+                print("⚠️ Warm cache entries and embeddings are out of sync; ignoring warm cache")
+                return cls()
+        return cache
+
+    def __len__(self):
+        return len(self.queries)
+
+    def lookup(self, query_text, query_embedding, threshold=0.85):
+        """Returns (matched_query, entry, score) or None"""
+        if query_text in self.entries:
+            return query_text, self.entries[query_text], 1.0
+        if not self.queries:
+            return None
+
+        similarities = self.embeddings @ query_embedding
+        best_idx = int(np.argmax(similarities))
+        best_score = float(similarities[best_idx])
+        if best_score >= threshold:
+            matched = self.queries[best_idx]
+            return matched, self.entries[matched], best_score
+        return None
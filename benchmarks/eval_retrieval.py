@@ -0,0 +1,281 @@
+"""
+Retrieval quality vs latency on the graph built by graph_builder.
+
+Runs every selected retrieval pipeline over a golden set of questions with
+their expected section IDs and reports recall@k, MRR and per-query latency
+side by side, so a faster pipeline can be checked against the current one
+("dense": the backend's top_section ranking) before it ships.
+
+    python benchmarks/eval_retrieval.py --golden data/golden.jsonl
+    python benchmarks/eval_retrieval.py --golden data/golden.jsonl --pipelines dense dense_fp16 hybrid --k 1 5 10
+
+Golden set: JSON lines {"question": "...", "expected": ["5.5.1.2", ...]}.
+--make-golden writes a starter set from section titles; such questions share
+words with the indexed titles, so lexical pipelines look better on it than
+on real user questions.
+"""
+
+import argparse
+import json
+import math
+import pickle
+import random
+import re
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+GRAPH_PATH = BASE_DIR / "data" / "unified_graph.pkl"
+
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+
+from retrieval import rank_sections
+from router import build_route_indexes, route_query
+from shared_index import build_corpus, load_or_build_embeddings
+
+from stub_encoder import HashingEncoder
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)*")
+GOLDEN_TEMPLATES = ["what is {title}?", "explain {title}", "what does the spec say about {title}?"]
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class LexicalIndex:
+    """BM25 over the same "title. text" documents the dense index embeds"""
+
+    def __init__(self, corpus, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(corpus)
+        self.doc_lengths = np.zeros(len(corpus), dtype=np.float32)
+        postings = defaultdict(list)
+        for i, doc in enumerate(corpus):
+            counts = Counter(tokenize(doc))
+            self.doc_lengths[i] = sum(counts.values())
+            for term, tf in counts.items():
+                postings[term].append((i, tf))
+        self.avg_length = float(self.doc_lengths.mean()) if len(corpus) else 0.0
+        self.postings = {
+            term: (np.array([i for i, _ in p]), np.array([tf for _, tf in p], dtype=np.float32))
+            for term, p in postings.items()
+        }
+
+    def scores(self, query_text):
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for term in set(tokenize(query_text)):
+            if term not in self.postings:
+                continue
+            docs, tfs = self.postings[term]
+            idf = math.log(1 + (self.doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            norm = tfs + self.k1 * (1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length)
+            scores[docs] += idf * tfs * (self.k1 + 1) / norm
+        return scores
+
+
+def top_k(scores, node_ids, k):
+    k = min(k, len(node_ids))
+    top = np.argpartition(-scores, k - 1)[:k]
+    return [node_ids[i] for i in top[np.argsort(-scores[top])]]
+
+
+def build_pipelines(G, node_ids, corpus, corpus_embeddings):
+    """
+    {name: search(query_text, query_embedding, k) -> [section_id, ...]}.
+    New candidates (ANN, other quantizations, chunked indexes) go here.
+    """
+    corpus_embeddings = np.asarray(corpus_embeddings, dtype=np.float32)
+    fp16_embeddings = corpus_embeddings.astype(np.float16)
+    lexical = LexicalIndex(corpus)
+    route_indexes = build_route_indexes(G)
+
+    def dense(query_text, query_embedding, k):
+        return rank_sections(query_embedding, corpus_embeddings, node_ids, k)
+
+    def dense_fp16(query_text, query_embedding, k):
+        return top_k(fp16_embeddings @ query_embedding.astype(np.float16), node_ids, k)
+
+    def bm25(query_text, query_embedding, k):
+        return top_k(lexical.scores(query_text), node_ids, k)
+
+    def hybrid(query_text, query_embedding, k, rrf_k=60, depth=50):
+        """Reciprocal rank fusion of the dense and BM25 rankings"""
+        fused = defaultdict(float)
+        for ranking in (dense(query_text, query_embedding, depth), bm25(query_text, None, depth)):
+            for rank, sid in enumerate(ranking):
+                fused[sid] += 1 / (rrf_k + rank + 1)
+        return sorted(fused, key=fused.get, reverse=True)[:k]
+
+    def routed_dense(query_text, query_embedding, k):
+        """Router fast-path sections first (explicit section IDs), then dense"""
+        routed = route_query(query_text.lower(), G, route_indexes)
+        ranking = list(routed["highlight"]) if routed else []
+        ranking += [sid for sid in dense(query_text, query_embedding, k) if sid not in ranking]
+        return ranking[:k]
+
+    return {
+        "dense": dense,
+        "dense_fp16": dense_fp16,
+        "bm25": bm25,
+        "hybrid": hybrid,
+        "routed_dense": routed_dense,
+    }
+
+
+# Pipelines that need the query embedding pay for encoding it
+NEEDS_EMBEDDING = {"dense", "dense_fp16", "hybrid", "routed_dense"}
+
+
+def read_golden(path):
+    golden = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                golden.append({"question": entry["question"], "expected": [str(s) for s in entry["expected"]]})
+    return golden
+
+
+def make_golden(G, size, seed=0):
+    """Title-derived questions for a random sample of titled sections"""
+    rng = random.Random(seed)
+    titled = sorted(
+        sid for sid, data in G.nodes(data=True)
+        if (data.get("title") or "").strip() not in ("", "Untitled Section") and data.get("text")
+    )
+    golden = []
+    for sid in rng.sample(titled, min(size, len(titled))):
+        title = G.nodes[sid]["title"].strip().rstrip(".")
+        golden.append({"question": rng.choice(GOLDEN_TEMPLATES).format(title=title), "expected": [sid]})
+    return golden
+
+
+def evaluate(pipeline, golden, query_embeddings, encode_seconds, ks, needs_embedding):
+    """Per-query ranks and latencies plus recall@k / MRR over the golden set"""
+    max_k = max(ks)
+    per_query = []
+    for entry, query_embedding, encode_time in zip(golden, query_embeddings, encode_seconds):
+        start = time.perf_counter()
+        ranking = pipeline(entry["question"], query_embedding, max_k)
+        latency = time.perf_counter() - start + (encode_time if needs_embedding else 0.0)
+
+        expected = set(entry["expected"])
+        ranks = [i + 1 for i, sid in enumerate(ranking) if sid in expected]
+        per_query.append({
+            "question": entry["question"],
+            "ranking": ranking,
+            "first_hit_rank": ranks[0] if ranks else None,
+            "recall": {k: len(expected & set(ranking[:k])) / len(expected) for k in ks},
+            "latency_ms": latency * 1000,
+        })
+
+    latencies = np.array([q["latency_ms"] for q in per_query])
+    return {
+        "recall": {k: float(np.mean([q["recall"][k] for q in per_query])) for k in ks},
+        "mrr": float(np.mean([1 / q["first_hit_rank"] if q["first_hit_rank"] else 0.0 for q in per_query])),
+        "latency_ms": {
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "mean": float(latencies.mean()),
+        },
+        "per_query": per_query,
+    }
+
+
+def print_report(results, ks):
+    header = f"{'pipeline':<16}" + "".join(f"{f'R@{k}':>8}" for k in ks) + f"{'MRR':>8}{'p50 ms':>10}{'p95 ms':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, result in results.items():
+        row = f"{name:<16}" + "".join(f"{result['recall'][k]:>8.3f}" for k in ks)
+        row += f"{result['mrr']:>8.3f}{result['latency_ms']['p50']:>10.3f}{result['latency_ms']['p95']:>10.3f}"
+        print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate retrieval pipelines: recall@k, MRR and latency")
+    parser.add_argument("--graph", default=str(GRAPH_PATH), help="graph built by graph_builder/main.py")
+    parser.add_argument("--golden", help="golden set JSONL with 'question' and 'expected' section IDs")
+    parser.add_argument("--make-golden", metavar="PATH", help="write a title-derived golden set to PATH and exit")
+    parser.add_argument("--golden-size", type=int, default=200)
+    parser.add_argument("--pipelines", nargs="+", help="pipelines to compare (default: all)")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5, 10], help="cutoffs for recall@k")
+    parser.add_argument("--stub-encoder", action="store_true", help="use the offline hashing encoder instead of SentenceTransformer")
+    parser.add_argument("--output", help="write summary and per-query results as JSON")
+    args = parser.parse_args()
+
+    with open(args.graph, "rb") as f:
+        G = pickle.load(f)
+
+    if args.make_golden:
+        golden = make_golden(G, args.golden_size)
+        with open(args.make_golden, "w", encoding="utf-8") as f:
+            for entry in golden:
+                f.write(json.dumps(entry) + "\n")
+        print(f"📝 {len(golden)} golden questions written to {args.make_golden}")
+        return
+
+    if not args.golden:
+        parser.error("--golden is required (or use --make-golden to create one)")
+    golden = read_golden(args.golden)
+    if not golden:
+        parser.error(f"no questions in {args.golden}")
+    missing = {sid for entry in golden for sid in entry["expected"]} - set(G.nodes)
+    if missing:
+        print(f"⚠️ {len(missing)} expected section IDs are not in the graph, e.g. {sorted(missing)[:5]}")
+
+    if args.stub_encoder:
+        model, model_name = HashingEncoder(), "hashing-stub"
+    else:
+        from sentence_transformers import SentenceTransformer
+        model, model_name = SentenceTransformer(MODEL_NAME), MODEL_NAME
+
+    node_ids, corpus = build_corpus(G)
+    if args.stub_encoder:
+        # Keep stub vectors out of the backend's on-disk embedding cache
+        corpus_embeddings = model.encode(corpus, convert_to_numpy=True, normalize_embeddings=True)
+    else:
+        corpus_embeddings = load_or_build_embeddings(model, model_name, corpus, node_ids, args.graph)
+    pipelines = build_pipelines(G, node_ids, corpus, corpus_embeddings)
+    selected = args.pipelines or list(pipelines)
+    unknown = set(selected) - set(pipelines)
+    if unknown:
+        parser.error(f"unknown pipelines {sorted(unknown)}; available: {', '.join(pipelines)}")
+
+    # Encode one question at a time, as the backend does, so encode latency is realistic
+    query_embeddings, encode_seconds = [], []
+    for entry in golden:
+        start = time.perf_counter()
+        query_embeddings.append(model.encode(entry["question"].lower(), convert_to_numpy=True, normalize_embeddings=True))
+        encode_seconds.append(time.perf_counter() - start)
+
+    print(f"🧪 {len(golden)} questions, {len(node_ids)} indexed sections, encoder {model_name}\n")
+    results = {
+        name: evaluate(pipelines[name], golden, query_embeddings, encode_seconds, args.k, name in NEEDS_EMBEDDING)
+        for name in selected
+    }
+    print_report(results, args.k)
+    print(f"\n(latency includes query encoding, {np.mean(encode_seconds) * 1000:.2f}ms on average, for embedding pipelines)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({
+                "graph": args.graph,
+                "golden": args.golden,
+                "encoder": model_name,
+                "results": results,
+            }, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
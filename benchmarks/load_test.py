@@ -0,0 +1,302 @@
+"""
+End-to-end load test for the backend's /api/query.
+
+Replays a query corpus against a running backend, either closed-loop
+(--concurrency users, each sending its next question as soon as the last one
+is answered) or open-loop (--rate arrivals per second, Poisson, with at most
+--concurrency in flight). Reports throughput, p50/p95/p99 latency, how
+queries were served (X-Query-Outcome), cache-hit ratio and error rate.
+
+    # backend already running against the stub LLM
+    python benchmarks/load_test.py --url http://localhost:5000 --concurrency 32 --duration 60
+
+    # start the stub LLM and a gunicorn backend, then load it
+    python benchmarks/load_test.py --spawn --backend-workers 4 --stub-latency-ms 800 --rate 20 --duration 60
+
+Open-loop latency is measured from each request's scheduled arrival, so time
+spent waiting for a free client slot counts against the backend.
+"""
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# A mix of graph fast-path questions, recurring questions (cache hits once
+# answered) and one-off ones, used when no --queries file is given
+DEFAULT_QUERIES = [
+    "show section 5.5.1",
+    "what changed in 5.5.1.2",
+    "list added sections in chapter 9",
+    "what is the attach procedure?",
+    "what is the attach procedure",
+    "explain the tracking area updating procedure",
+    "what happens when timer T3410 expires?",
+    "briefly explain the service request procedure",
+    "what are the EMM cause values for attach reject?",
+    "how is the GUTI reallocated?",
+    "explain the security mode control procedure in detail",
+    "what is the purpose of the ESM information request?",
+    "how does the UE handle an authentication failure?",
+    "what changed in the detach procedure?",
+    "what is the default EPS bearer context?",
+]
+
+CACHE_OUTCOMES = {"warm_cache", "fuzzy_cache"}
+
+
+def read_queries(path):
+    """One question per line, or JSON lines with a "query" field"""
+    queries = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line).get("query", "")
+            queries.append(line)
+    return queries
+
+
+def send_query(url, query_text, timeout):
+    """Returns (status, outcome); status 0 means the request failed without an HTTP response"""
+    body = json.dumps({"query": query_text}).encode("utf-8")
+    req = urllib.request.Request(f"{url}/api/query", data=body, headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            return response.status, response.headers.get("X-Query-Outcome", "unknown")
+    except urllib.error.HTTPError as e:
+        e.read()
+        return e.code, e.headers.get("X-Query-Outcome") or f"http_{e.code}"
+    except Exception:
+        return 0, "connection_error"
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = []
+        self.statuses = Counter()
+        self.outcomes = Counter()
+
+    def record(self, latency, status, outcome):
+        with self._lock:
+            self.latencies.append(latency)
+            self.statuses[status] += 1
+            self.outcomes[outcome] += 1
+
+
+def run_closed_loop(url, queries, concurrency, deadline, max_requests, timeout, recorder, shuffle):
+    """`concurrency` users, each sending its next question once the previous one is answered"""
+    counter = iter(range(max_requests or sys.maxsize))
+    counter_lock = threading.Lock()
+
+    def user(seed):
+        rng = random.Random(seed)
+        order = list(queries)
+        position = 0
+        while time.perf_counter() < deadline:
+            with counter_lock:
+                if next(counter, None) is None:
+                    return
+            if shuffle and position % len(order) == 0:
+                rng.shuffle(order)
+            query_text = order[position % len(order)]
+            position += 1
+            start = time.perf_counter()
+            status, outcome = send_query(url, query_text, timeout)
+            recorder.record(time.perf_counter() - start, status, outcome)
+
+    threads = [threading.Thread(target=user, args=(i,), daemon=True) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def run_open_loop(url, queries, rate, concurrency, deadline, max_requests, timeout, recorder, shuffle):
+    """Poisson arrivals at `rate`/s; latency includes time queued for one of `concurrency` slots"""
+    rng = random.Random(0)
+    slots = threading.BoundedSemaphore(concurrency)
+    threads = []
+
+    def fire(query_text, scheduled):
+        try:
+            status, outcome = send_query(url, query_text, timeout)
+            recorder.record(time.perf_counter() - scheduled, status, outcome)
+        finally:
+            slots.release()
+
+    next_arrival = time.perf_counter()
+    sent = 0
+    while next_arrival < deadline and (not max_requests or sent < max_requests):
+        query_text = rng.choice(queries) if shuffle else queries[sent % len(queries)]
+        delay = next_arrival - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        slots.acquire()
+        t = threading.Thread(target=fire, args=(query_text, next_arrival), daemon=True)
+        t.start()
+        threads.append(t)
+        sent += 1
+        next_arrival += rng.expovariate(rate)
+
+    for t in threads:
+        t.join()
+
+
+def summarize(recorder, elapsed):
+    latencies = np.array(recorder.latencies) * 1000
+    total = len(latencies)
+    ok = recorder.statuses.get(200, 0)
+    errors = total - ok
+    served = sum(count for outcome, count in recorder.outcomes.items() if outcome in CACHE_OUTCOMES | {"llm", "shared", "fast_path"})
+    cache_hits = sum(recorder.outcomes[o] for o in CACHE_OUTCOMES)
+    return {
+        "requests": total,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(float(np.percentile(latencies, 50)), 2) if total else None,
+            "p95": round(float(np.percentile(latencies, 95)), 2) if total else None,
+            "p99": round(float(np.percentile(latencies, 99)), 2) if total else None,
+            "max": round(float(latencies.max()), 2) if total else None,
+            "mean": round(float(latencies.mean()), 2) if total else None,
+        },
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        # Fast-path answers never reach a cache, so they are left out of the ratio
+        "cache_hit_ratio": round(cache_hits / (served - recorder.outcomes["fast_path"]), 4) if served - recorder.outcomes["fast_path"] else 0.0,
+        "statuses": {str(k): v for k, v in sorted(recorder.statuses.items())},
+        "outcomes": dict(recorder.outcomes.most_common()),
+    }
+
+
+def print_summary(summary):
+    lat = summary["latency_ms"]
+    print(f"\n📈 {summary['requests']} requests in {summary['elapsed_seconds']:.1f}s → {summary['throughput_rps']:.2f} req/s")
+    if summary["requests"]:
+        print(f"⏱️  latency p50 {lat['p50']:.1f}ms | p95 {lat['p95']:.1f}ms | p99 {lat['p99']:.1f}ms | max {lat['max']:.1f}ms")
+    print(f"🎯 cache-hit ratio {summary['cache_hit_ratio']:.1%} | error rate {summary['error_rate']:.1%}")
+    print("🔎 outcomes: " + ", ".join(f"{k}={v}" for k, v in summary["outcomes"].items()))
+    print("📟 statuses: " + ", ".join(f"{k}={v}" for k, v in summary["statuses"].items()))
+
+
+def wait_until_ready(url, timeout):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/readyz", timeout=5) as response:
+                if response.status == 200:
+                    return True
+        except Exception:
+            pass
+        time.sleep(1)
+    return False
+
+
+def spawn_services(args):
+    """Starts the stub LLM server and a gunicorn backend pointed at it; returns the processes"""
+    stub = subprocess.Popen([
+        sys.executable, str(BASE_DIR / "shared" / "stub_llm_server.py"),
+        "--port", str(args.stub_port),
+        "--latency-ms", str(args.stub_latency_ms),
+        "--jitter-ms", str(args.stub_jitter_ms),
+        "--error-rate", str(args.stub_error_rate),
+    ])
+    env = dict(
+        os.environ,
+        LLM_PROVIDER="openai",
+        LLM_BASE_URL=f"http://127.0.0.1:{args.stub_port}/v1",
+        OPENAI_API_KEY=os.getenv("OPENAI_API_KEY", "stub"),
+        BACKEND_BIND=args.url.split("://", 1)[-1],
+        BACKEND_WORKERS=str(args.backend_workers),
+    )
+    backend = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"],
+        cwd=str(BASE_DIR / "backend"),
+        env=env,
+    )
+    return [stub, backend]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test /api/query")
+    parser.add_argument("--url", default="http://127.0.0.1:5000", help="backend base URL")
+    parser.add_argument("--queries", help="query corpus (plain lines or JSONL with 'query'); defaults to a built-in mix")
+    parser.add_argument("--concurrency", type=int, default=16, help="closed-loop users, or max in flight with --rate")
+    parser.add_argument("--rate", type=float, help="open-loop arrival rate in requests/s (Poisson)")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to send load for")
+    parser.add_argument("--requests", type=int, help="stop after this many requests")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request client timeout in seconds")
+    parser.add_argument("--no-shuffle", action="store_true", help="replay queries in file order")
+    parser.add_argument("--output", help="write the summary as JSON")
+    parser.add_argument("--spawn", action="store_true", help="start the stub LLM and a gunicorn backend first")
+    parser.add_argument("--backend-workers", type=int, default=4)
+    parser.add_argument("--stub-port", type=int, default=8001)
+    parser.add_argument("--stub-latency-ms", type=float, default=800)
+    parser.add_argument("--stub-jitter-ms", type=float, default=200)
+    parser.add_argument("--stub-error-rate", type=float, default=0.0)
+    parser.add_argument("--ready-timeout", type=float, default=300, help="seconds to wait for /readyz")
+    args = parser.parse_args()
+    args.url = args.url.rstrip("/")
+
+    queries = read_queries(args.queries) if args.queries else DEFAULT_QUERIES
+    if not queries:
+        print("❌ No queries to send.")
+        sys.exit(1)
+
+    processes = spawn_services(args) if args.spawn else []
+    try:
+        print(f"⏳ Waiting for {args.url}/readyz...")
+        if not wait_until_ready(args.url, args.ready_timeout):
+            print("❌ Backend did not become ready.")
+            sys.exit(1)
+
+        mode = f"open loop at {args.rate}/s (max {args.concurrency} in flight)" if args.rate else f"closed loop with {args.concurrency} users"
+        print(f"🚀 {len(queries)} distinct queries, {mode}, for {args.duration}s")
+
+        recorder = Recorder()
+        start = time.perf_counter()
+        deadline = start + args.duration
+        if args.rate:
+            run_open_loop(args.url, queries, args.rate, args.concurrency, deadline, args.requests, args.timeout, recorder, not args.no_shuffle)
+        else:
+            run_closed_loop(args.url, queries, args.concurrency, deadline, args.requests, args.timeout, recorder, not args.no_shuffle)
+        summary = summarize(recorder, time.perf_counter() - start)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+    summary["config"] = {
+        "url": args.url,
+        "mode": "open" if args.rate else "closed",
+        "rate": args.rate,
+        "concurrency": args.concurrency,
+        "distinct_queries": len(queries),
+    }
+    print_summary(summary)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"💾 Summary saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
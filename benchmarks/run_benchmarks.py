@@ -0,0 +1,252 @@
+"""
+Microbenchmarks for the graph builder and backend retrieval on synthetic specs.
+
+Each size generates a synthetic "Rel-10" spec and a mutated "Rel-17" one
+(see synthetic_spec.py), times every stage, prints a table with the scaling
+exponent per stage (slope of log time vs log sections) and stores the results
+as JSON so later runs can be compared against them.
+
+    python benchmarks/run_benchmarks.py --sizes 250 1000 4000 --stub-encoder
+    python benchmarks/run_benchmarks.py --stub-encoder --compare benchmarks/results/baseline.json
+
+--stub-encoder swaps SentenceTransformer for a hashing encoder so the suite
+runs offline; timings for encoding stages then only reflect the pipeline.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+RESULTS_DIR = BASE_DIR / "benchmarks" / "results"
+
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BASE_DIR / "backend"))
+sys.path.insert(0, str(BASE_DIR / "graph_builder"))
+
+from parser.split_sections import split_docx_into_sections, split_text_into_sections
+from graphs import builder
+from graphs.builder import build_semantic_graph, build_graph_from_sections, get_neighbors
+from graphs.visualizer import visualize_semantic_graph
+from main import flatten_section
+from router import build_route_indexes, route_query
+from retrieval import top_section, build_context
+from shared_index import build_corpus
+from impact import ImpactIndex
+from shared.tables import build_table_store, TableIndex
+
+from synthetic_spec import generate_spec, mutate_release, to_plain_text, write_docx
+from stub_encoder import HashingEncoder
+
+QUERIES_PER_SIZE = 50
+MIN_DELTA_SECONDS = 0.001
+
+
+def time_call(fn, repeat):
+    """Runs fn `repeat` times; returns (timings, last result)"""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - start)
+    return timings, result
+
+
+def benchmark_size(n_sections, repeat, workdir, skip=()):
+    """{benchmark name: [seconds, ...]} for one spec size"""
+    spec10 = generate_spec(n_sections, seed=n_sections)
+    spec17 = mutate_release(spec10, seed=n_sections + 1)
+    results = {}
+
+    def run(name, fn):
+        if name in skip:
+            return None
+        timings, result = time_call(fn, repeat)
+        results[name] = timings
+        return result
+
+    # -------- Splitting --------
+    docx_path = Path(workdir) / f"spec_{n_sections}.docx"
+    write_docx(spec17, docx_path)
+    run("split_docx", lambda: split_docx_into_sections(docx_path))
+    text10 = to_plain_text(spec10)
+    run("split_text", lambda: split_text_into_sections(text10))
+    table_store = run("build_table_store", lambda: build_table_store(spec17))
+
+    # -------- Graph building --------
+    flattened10 = {sid: flatten_section(sec) for sid, sec in spec10.items()}
+    flattened17 = {sid: flatten_section(sec) for sid, sec in spec17.items()}
+    G = build_semantic_graph(flattened10, flattened17)
+    run("build_semantic_graph", lambda: build_semantic_graph(flattened10, flattened17))
+
+    all_ids = set(G.nodes)
+    run("get_neighbors", lambda: [get_neighbors(sid, all_ids) for sid in all_ids])
+    run("build_graph_from_sections", lambda: build_graph_from_sections(flattened17))
+    html_path = Path(workdir) / f"graph_{n_sections}.html"
+    # pyvis copies its JS assets into lib/ under the working directory
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        run("visualize_semantic_graph", lambda: visualize_semantic_graph(G, str(html_path), spec10, spec17))
+    finally:
+        os.chdir(cwd)
+
+    # -------- Backend retrieval --------
+    model = builder.get_model()
+    node_ids, corpus = build_corpus(G)
+    corpus_embeddings = run(
+        "encode_corpus",
+        lambda: model.encode(corpus, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32),
+    )
+    if corpus_embeddings is None:
+        corpus_embeddings = model.encode(corpus, convert_to_numpy=True, normalize_embeddings=True).astype(np.float32)
+
+    sample_ids = sorted(G.nodes)[:: max(1, len(G) // QUERIES_PER_SIZE)][:QUERIES_PER_SIZE]
+    queries = [f"explain {G.nodes[sid].get('text', '')[:80]}" for sid in sample_ids]
+    query_embeddings = model.encode(queries, convert_to_numpy=True, normalize_embeddings=True)
+
+    def retrieve_all():
+        for query_text, query_embedding in zip(queries, query_embeddings):
+            build_context(G, top_section(query_embedding, corpus_embeddings, node_ids), query_text)
+
+    run("retrieval_per_query", retrieve_all)
+    route_indexes = run("build_route_indexes", lambda: build_route_indexes(G))
+    if route_indexes is None:
+        route_indexes = build_route_indexes(G)
+    route_queries = [f"show section {sid}" for sid in sample_ids] + ["list added sections", "what changed in 4"]
+    run("route_query", lambda: [route_query(q, G, route_indexes) for q in route_queries])
+    impact_index = run("build_impact_index", lambda: ImpactIndex(G)) or ImpactIndex(G)
+    run("impact_upstream", lambda: [impact_index._impacted(sid, 3, "upstream") for sid in sample_ids])
+    if table_store is not None:
+        table_index = TableIndex(table_store)
+        run("table_search", lambda: [table_index.search(q) for q in queries])
+
+    # Per-query benchmarks are reported per query so sizes stay comparable
+    for name, count in (("retrieval_per_query", len(queries)), ("route_query", len(route_queries)), ("impact_upstream", len(sample_ids)), ("table_search", len(queries))):
+        if name in results:
+            results[name] = [t / count for t in results[name]]
+
+    return results
+
+
+def scaling_exponent(sizes, seconds):
+    """Slope of log(seconds) over log(sections): ~1 is linear, ~2 quadratic"""
+    points = [(n, s) for n, s in zip(sizes, seconds) if s and s > 0]
+    if len(points) < 2:
+        return None
+    x = np.log([n for n, _ in points])
+    y = np.log([s for _, s in points])
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def summarize(raw):
+    """{name: {size: [timings]}} -> {name: {"sizes": {size: {min, median}}, "exponent": float}}"""
+    summary = {}
+    for name, by_size in raw.items():
+        sizes = sorted(by_size, key=int)
+        stats = {size: {"min": min(by_size[size]), "median": statistics.median(by_size[size])} for size in sizes}
+        summary[name] = {
+            "sizes": stats,
+            "exponent": scaling_exponent([int(s) for s in sizes], [stats[s]["min"] for s in sizes]),
+        }
+    return summary
+
+
+def print_table(summary, sizes):
+    header = f"{'benchmark':<28}" + "".join(f"{n:>12}" for n in sizes) + f"{'exponent':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, entry in summary.items():
+        row = f"{name:<28}"
+        for n in sizes:
+            stat = entry["sizes"].get(str(n))
+            row += f"{stat['min'] * 1000:>10.2f}ms" if stat else f"{'-':>12}"
+        exponent = entry["exponent"]
+        row += f"{exponent:>10.2f}" if exponent is not None else f"{'-':>10}"
+        print(row)
+
+
+def compare(summary, baseline_path, threshold):
+    """Prints benchmarks that got slower than the baseline by more than `threshold`; returns their count"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["benchmarks"]
+
+    regressions = 0
+    for name, entry in summary.items():
+        for size, stat in entry["sizes"].items():
+            base = baseline.get(name, {}).get("sizes", {}).get(size)
+            # Sub-millisecond differences are timer noise, not regressions
+            if not base or base["min"] <= 0 or abs(stat["min"] - base["min"]) < MIN_DELTA_SECONDS:
+                continue
+            ratio = stat["min"] / base["min"]
+            if ratio > 1 + threshold:
+                regressions += 1
+                print(f"🐢 {name} @ {size}: {base['min'] * 1000:.2f}ms → {stat['min'] * 1000:.2f}ms ({ratio:.2f}x)")
+            elif ratio < 1 - threshold:
+                print(f"🚀 {name} @ {size}: {base['min'] * 1000:.2f}ms → {stat['min'] * 1000:.2f}ms ({ratio:.2f}x)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark graph building and retrieval on synthetic specs")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[250, 1000, 4000], help="sections per synthetic spec")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per benchmark (min and median are reported)")
+    parser.add_argument("--stub-encoder", action="store_true", help="use an offline hashing encoder instead of SentenceTransformer")
+    parser.add_argument("--skip", nargs="*", default=[], help="benchmark names to skip, e.g. split_docx visualize_semantic_graph")
+    parser.add_argument("--output", help="results JSON (default: benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--compare", help="baseline results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="relative slowdown reported as a regression")
+    args = parser.parse_args()
+
+    if args.stub_encoder:
+        builder.set_encoder(HashingEncoder())
+    else:
+        builder.get_model()  # Load outside the timed region
+
+    raw = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            print(f"⏱️  Benchmarking {n} sections...")
+            for name, timings in benchmark_size(n, args.repeat, workdir, set(args.skip)).items():
+                raw.setdefault(name, {})[str(n)] = timings
+
+    summary = summarize(raw)
+    print()
+    print_table(summary, args.sizes)
+
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump({
+            "created": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "encoder": "stub" if args.stub_encoder else builder.MODEL_NAME,
+            "sizes": args.sizes,
+            "repeat": args.repeat,
+            "benchmarks": summary,
+            "raw": raw,
+        }, f, indent=2)
+    print(f"\n💾 Results saved to {output}")
+
+    if args.compare:
+        print(f"\n📊 Comparing against {args.compare} (threshold {args.threshold:.0%})")
+        regressions = compare(summary, args.compare, args.threshold)
+        if regressions:
+            print(f"❌ {regressions} regression(s)")
+            sys.exit(1)
+        print("✅ No regressions")
+
+
+if __name__ == "__main__":
+    main()
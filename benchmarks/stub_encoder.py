@@ -0,0 +1,37 @@
+import re
+import zlib
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class HashingEncoder:
+    """
+    Offline stand-in for SentenceTransformer: a hashed bag of words and word
+    bigrams, L2-normalized. Deterministic and dependency-free, so texts that
+    share vocabulary still score higher than unrelated ones.
+    """
+
+    def __init__(self, dim=384):
+        self.dim = dim
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = TOKEN_RE.findall(text.lower())
+        for token in tokens:
+            vec[zlib.crc32(token.encode()) % self.dim] += 1.0
+        for a, b in zip(tokens, tokens[1:]):
+            vec[zlib.crc32(f"{a} {b}".encode()) % self.dim] += 0.5
+        return vec
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, normalize_embeddings=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+
+        embeddings = np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.where(norms == 0, 1, norms)
+
+        return embeddings[0] if single else embeddings
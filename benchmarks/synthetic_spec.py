@@ -0,0 +1,176 @@
+"""
+Synthetic 3GPP-like specifications for benchmarking.
+
+Sections come out in the same shape as parser/split_sections.py produces:
+    {section_id: {"title": ..., "content": [{"type": "text"|"bullet", "text": ...}], "tables": [{"rows": [...]}]}}
+with hierarchical dotted IDs (4, 4.1, 4.1.2, ...), cross-references to other
+subclauses and IE/cause tables, so every stage sees realistic structure.
+"""
+
+import random
+
+from docx import Document
+
+SUBJECTS = [
+    "The UE", "The MME", "The network", "The AMF", "The SMF", "The eNodeB", "The EMM entity",
+    "The ESM sublayer", "The lower layers", "The NAS security context",
+]
+VERBS = [
+    "shall initiate", "shall abort", "may include", "shall send", "shall stop", "shall reset",
+    "shall consider", "may request", "shall store", "shall delete",
+]
+OBJECTS = [
+    "the attach procedure", "the tracking area updating procedure", "the ATTACH REQUEST message",
+    "timer T3410", "timer T3411", "the GUTI reallocation procedure", "the default EPS bearer context",
+    "the security mode control procedure", "the EMM cause value", "the PDN connectivity request",
+    "the service request procedure", "the detach procedure", "the NAS COUNT", "the registration area",
+]
+CONDITIONS = [
+    "if the UE is in EMM-REGISTERED state", "upon expiry of the timer", "when the lower layers indicate a failure",
+    "unless the network rejects the request", "if the message integrity check fails",
+    "while the EMM-CONNECTED mode is active", "before entering state EMM-DEREGISTERED",
+]
+TITLE_WORDS = [
+    "Attach", "Detach", "Tracking area updating", "Service request", "Paging", "Authentication",
+    "Security mode control", "Identification", "EMM information", "Default EPS bearer context activation",
+    "Dedicated bearer", "PDN connectivity", "Bearer resource allocation", "Transport of NAS messages",
+    "Abnormal cases", "General", "Procedure initiation", "Procedure completion", "Timers", "Message functional definitions",
+]
+IE_NAMES = [
+    "EPS mobile identity", "UE network capability", "ESM message container", "Tracking area identity",
+    "DRX parameter", "MS network capability", "EMM cause", "GPRS timer", "TAI list", "EPS bearer context status",
+    "Additional update type", "Voice domain preference", "Device properties", "Old GUTI type",
+]
+CAUSE_NAMES = [
+    "IMSI unknown in HSS", "Illegal UE", "IMEI not accepted", "EPS services not allowed",
+    "Tracking area not allowed", "Roaming not allowed in this tracking area", "Network failure",
+    "Congestion", "Semantically incorrect message", "Invalid mandatory information", "Protocol error, unspecified",
+]
+
+
+def random_sentence(rng, section_ids):
+    sentence = f"{rng.choice(SUBJECTS)} {rng.choice(VERBS)} {rng.choice(OBJECTS)} {rng.choice(CONDITIONS)}"
+    if section_ids and rng.random() < 0.3:
+        sentence += f", as specified in subclause {rng.choice(section_ids)}"
+    return sentence + "."
+
+
+def random_paragraph(rng, section_ids):
+    return " ".join(random_sentence(rng, section_ids) for _ in range(rng.randint(1, 4)))
+
+
+def random_table(rng):
+    if rng.random() < 0.5:
+        rows = [["IEI", "Information Element", "Type/Reference", "Presence", "Format", "Length"]]
+        for _ in range(rng.randint(3, 10)):
+            ie = rng.choice(IE_NAMES)
+            rows.append([
+                f"{rng.randint(0x10, 0xFF):X}", ie, f"{ie} 9.9.{rng.randint(2, 4)}.{rng.randint(1, 40)}",
+                rng.choice(["M", "O", "C"]), rng.choice(["V", "TV", "TLV", "LV-E"]), f"{rng.randint(1, 20)}",
+            ])
+    else:
+        rows = [["Cause value", "Meaning"]]
+        for _ in range(rng.randint(3, 10)):
+            value = rng.randint(2, 111)
+            rows.append([f"{value:08b}", f"#{value} {rng.choice(CAUSE_NAMES)}"])
+    return {"rows": rows}
+
+
+def generate_section_ids(n_sections, rng, max_depth=5):
+    """Depth-first numbering: each new ID is a child, next sibling or an ancestor's next sibling"""
+    ids = []
+    path = [4]  # 3GPP specs put procedures from clause 4 onwards
+    ids.append("4")
+    while len(ids) < n_sections:
+        r = rng.random()
+        if r < 0.45 and len(path) < max_depth:
+            path.append(1)
+        elif r < 0.85 or len(path) == 1:
+            path[-1] += 1
+        else:
+            path.pop()
+            path[-1] += 1
+        ids.append(".".join(str(p) for p in path))
+    return ids
+
+
+def make_section(rng, section_ids, title=None):
+    content = []
+    for _ in range(rng.randint(1, 5)):
+        content.append({"type": "text", "text": random_paragraph(rng, section_ids)})
+        if rng.random() < 0.25:
+            content.extend({"type": "bullet", "text": "- " + random_sentence(rng, section_ids)} for _ in range(rng.randint(2, 4)))
+    tables = [random_table(rng)] if rng.random() < 0.2 else []
+    return {"title": title or rng.choice(TITLE_WORDS), "content": content, "tables": tables}
+
+
+def generate_spec(n_sections, seed=0):
+    """A synthetic release with `n_sections` sections, deterministic for a given seed"""
+    rng = random.Random(seed)
+    section_ids = generate_section_ids(n_sections, rng)
+    return {sid: make_section(rng, section_ids) for sid in section_ids}
+
+
+def mutate_release(spec, seed=1, modified=0.1, added=0.03, removed=0.03, moved=0.02):
+    """
+    The "next release" of a spec: a fraction of sections get edited paragraphs,
+    some are dropped, some new ones appear and some leaves are renumbered.
+    """
+    rng = random.Random(seed)
+    section_ids = list(spec)
+    leaves = [sid for i, sid in enumerate(section_ids) if i + 1 == len(section_ids) or not section_ids[i + 1].startswith(sid + ".")]
+    new_spec = {}
+
+    for sid, section in spec.items():
+        r = rng.random()
+        if r < removed:
+            continue
+        section = {"title": section["title"], "content": list(section["content"]), "tables": section["tables"]}
+        if r < removed + modified:
+            idx = rng.randrange(len(section["content"]))
+            section["content"][idx] = {"type": "text", "text": random_paragraph(rng, section_ids)}
+            if rng.random() < 0.5:
+                section["content"].append({"type": "text", "text": random_paragraph(rng, section_ids)})
+        new_spec[sid] = section
+
+    # Renumber some leaves to an unused number under the same parent
+    for sid in rng.sample(leaves, int(len(leaves) * moved)):
+        if sid not in new_spec or "." not in sid:
+            continue
+        parent, last = sid.rsplit(".", 1)
+        new_id = f"{parent}.{int(last) + 100}"
+        if new_id not in new_spec:
+            new_spec[new_id] = new_spec.pop(sid)
+
+    for i in range(int(len(spec) * added)):
+        parent = rng.choice(section_ids)
+        new_id = f"{parent}.{200 + i}"
+        new_spec[new_id] = make_section(rng, section_ids)
+
+    return new_spec
+
+
+def to_plain_text(spec):
+    """Plain text like read_doc() returns for a .doc (tables are lost, as with Word COM text)"""
+    lines = []
+    for sid, section in spec.items():
+        lines.append(f"{sid} {section['title']}")
+        lines.extend(entry["text"] for entry in section["content"])
+    return "\n".join(lines)
+
+
+def write_docx(spec, path):
+    """A .docx that split_docx_into_sections parses back into `spec`"""
+    doc = Document()
+    for sid, section in spec.items():
+        doc.add_paragraph(f"{sid} {section['title']}")
+        for entry in section["content"]:
+            style = "List Bullet" if entry["type"] == "bullet" else None
+            doc.add_paragraph(entry["text"], style=style)
+        for table in section["tables"]:
+            rows = table["rows"]
+            docx_table = doc.add_table(rows=len(rows), cols=len(rows[0]))
+            for row, values in zip(docx_table.rows, rows):
+                for cell, value in zip(row.cells, values):
+                    cell.text = value
+    doc.save(str(path))
@@ -1,8 +1,24 @@
 import networkx as nx
 import re
-from sentence_transformers import SentenceTransformer, util
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+from graphs.differ import compute_text_diff, text_hash
+from graphs.matcher import match_moved_sections
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+model = None
+
+def get_model():
+    """Loads the sentence encoder on first use"""
+    global model
+    if model is None:
+        from sentence_transformers import SentenceTransformer
+        model = SentenceTransformer(MODEL_NAME)
+    return model
+
+def set_encoder(encoder):
+    """Replaces the sentence encoder (anything with a SentenceTransformer-style encode), e.g. for offline benchmarks"""
+    global model
+    model = encoder
 
 def extract_references(text):
     """Extracts section references like 4.3.2 from text"""
@@ -31,12 +47,46 @@ def get_neighbors(section_id, all_ids):
         "children": sorted(children),
     }
 
+def encode_unique(texts):
+    """Encodes each distinct text once, in a single batched call"""
+    unique_texts = list(dict.fromkeys(texts))
+    if not unique_texts:
+        return {}
+    embeddings = get_model().encode(unique_texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+    return dict(zip(unique_texts, embeddings))
+
+
+def detect_moved_sections(norm_10, norm_17, all_section_ids, threshold=0.9):
+    """
+    Matches sections that exist only in rel10 against sections that exist only
+    in rel17 and returns {old_id: (new_id, similarity)} for renumbered clauses.
+    """
+    removed_ids = sorted(sid for sid in all_section_ids if norm_10.get(sid, "").strip() and not norm_17.get(sid, "").strip())
+    added_ids = sorted(sid for sid in all_section_ids if norm_17.get(sid, "").strip() and not norm_10.get(sid, "").strip())
+    if not removed_ids or not added_ids:
+        return {}
+
+    removed_texts = [norm_10[sid].strip() for sid in removed_ids]
+    added_texts = [norm_17[sid].strip() for sid in added_ids]
+    embeddings = encode_unique(removed_texts + added_texts)
+
+    matches = match_moved_sections(
+        removed_ids, [embeddings[t] for t in removed_texts],
+        added_ids, [embeddings[t] for t in added_texts],
+        threshold=threshold,
+    )
+    print(f"🔀 {len(matches)} moved/renumbered sections detected among {len(removed_ids)} removed and {len(added_ids)} added")
+    return {old: (new, sim) for old, new, sim in matches}
+
+
 def build_semantic_graph(sections_10: dict, sections_17: dict):
     """
     Builds ONE graph with change info encoded in node attributes.
     - If section only in rel10 → removed
     - If only in rel17 → added
-    - If in both → compare embeddings
+    - If a removed and an added section carry the same content → moved (keyed by the new ID)
+    - If in both → identical text (by hash) is unchanged without encoding;
+      otherwise both versions are embedded (one batched call) and compared
     """
     G = nx.DiGraph()
 
@@ -45,25 +95,58 @@ def build_semantic_graph(sections_10: dict, sections_17: dict):
 
     all_section_ids = set(norm_10) | set(norm_17)
 
+    # First pass: hash short-circuit. Whitespace-only differences hash the same and
+    # also encode the same, so only textually different sections need embeddings.
+    # Whole texts are compared (not just the differing paragraphs) so the
+    # classification is exactly the whole-text cosine the graph always used.
+    pending = set()
     for sid in all_section_ids:
-        old_text = sections_10.get(sid, "").strip()
-        new_text = sections_17.get(sid, "").strip()
+        old_text = norm_10.get(sid, "").strip()
+        new_text = norm_17.get(sid, "").strip()
+        if old_text and new_text and text_hash(old_text) != text_hash(new_text):
+            pending.add(sid)
+
+    print(f"🔎 {len(pending)} of {len(all_section_ids)} sections differ textually; embedding only those")
+    embeddings = encode_unique([text for sid in pending for text in (norm_10[sid].strip(), norm_17[sid].strip())])
+
+    moved = detect_moved_sections(norm_10, norm_17, all_section_ids)
+    moved_from = {new: (old, sim) for old, (new, sim) in moved.items()}
+
+    for sid in all_section_ids:
+        if sid in moved:
+            continue  # Represented by the node under its new number
+
+        old_text = norm_10.get(sid, "").strip()
+        new_text = norm_17.get(sid, "").strip()
 
         node_attrs = {"section_id": sid}
 
-        if not old_text and new_text:
+        if sid in moved_from:
+            old_sid, sim = moved_from[sid]
+            old_text = norm_10[old_sid].strip()
+            node_attrs["type"] = "moved"
+            node_attrs["old_section_id"] = old_sid
+            node_attrs["new_section_id"] = sid
+            node_attrs["similarity"] = sim
+            node_attrs["old_text"] = old_text
+            node_attrs["new_text"] = new_text
+            node_attrs["diff"] = compute_text_diff(old_text, new_text)
+            node_attrs["text"] = new_text
+        elif not old_text and new_text:
             node_attrs["type"] = "added"
             node_attrs["text"] = new_text
         elif old_text and not new_text:
             node_attrs["type"] = "removed"
             node_attrs["text"] = old_text
         elif old_text and new_text:
-            sim = util.cos_sim(model.encode(old_text), model.encode(new_text)).item()
+            sim = float(embeddings[old_text] @ embeddings[new_text]) if sid in pending else 1.0
+
             if sim < 0.85:
                 node_attrs["type"] = "modified"
                 node_attrs["similarity"] = round(sim, 3)
                 node_attrs["old_text"] = old_text
                 node_attrs["new_text"] = new_text
+                node_attrs["diff"] = compute_text_diff(old_text, new_text)
                 node_attrs["text"] = new_text
             else:
                 node_attrs["type"] = "unchanged"
@@ -71,15 +154,18 @@ def build_semantic_graph(sections_10: dict, sections_17: dict):
 
         G.add_node(sid, **node_attrs)
 
-        # Add mention-based edges
+        # Add mention-based edges; references to a moved section's old number point
+        # at its node under the new number instead of creating an empty placeholder
         source_text = new_text or old_text or ""
         for ref in extract_references(source_text):
+            ref = moved[ref][0] if ref in moved else ref
             if ref != sid:
                 G.add_edge(sid, ref, reason="mentions")
 
-    # Add neighbors to each node
+    # Add neighbors to each node (old numbers of moved sections no longer exist)
+    current_ids = all_section_ids - set(moved)
     for sid in G.nodes:
-        G.nodes[sid]["neighbors"] = get_neighbors(sid, all_section_ids)
+        G.nodes[sid]["neighbors"] = get_neighbors(sid, current_ids)
 
     return G
 
@@ -0,0 +1,49 @@
+import hashlib
+import re
+from difflib import SequenceMatcher
+
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.;:!?])\s+(?=[A-Z0-9(\-–•\"'])")
+
+
+def normalize_text(text):
+    """Collapses whitespace so formatting-only differences hash the same"""
+    return " ".join(text.split())
+
+
+def text_hash(text):
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def split_sentences(text):
+    """Splits section text into sentences (falls back to lines for list-like content)"""
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            sentences.extend(s.strip() for s in SENTENCE_SPLIT_RE.split(line) if s.strip())
+    return sentences
+
+
+def compute_text_diff(old_text, new_text):
+    """
+    Sentence-level diff between two versions of a section.
+    Only the changed spans are kept, e.g.
+        [{"op": "replace", "old": [...], "new": [...]}, {"op": "insert", "new": [...]}]
+    """
+    old_sentences = split_sentences(old_text)
+    new_sentences = split_sentences(new_text)
+
+    matcher = SequenceMatcher(None, old_sentences, new_sentences, autojunk=False)
+    diff = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        entry = {"op": tag}
+        if i2 > i1:
+            entry["old"] = old_sentences[i1:i2]
+        if j2 > j1:
+            entry["new"] = new_sentences[j1:j2]
+        diff.append(entry)
+
+    return diff
+
@@ -0,0 +1,163 @@
+"""
+Sharded change export.
+
+Changed sections are streamed to disk one JSON object per line instead of
+one big indented JSON document:
+
+    changes/
+      index.json            totals, per-type counts, shard list, section ID -> shard/type
+      shards/chapter_5.ndjson, chapter_9.ndjson, ...
+
+so a viewer can read index.json and then fetch only the chapters it shows;
+the shards in index order are the full export. Records keep each text once:
+`new_text` is dropped where it equals `text`, and `neighbors` is left out
+because it follows from the section IDs in the index.
+"""
+
+import json
+import os
+import re
+import shutil
+from collections import Counter
+from pathlib import Path
+
+INDEX_NAME = "index.json"
+SHARD_DIR = "shards"
+# Graph attributes not written to change records (see module docstring)
+DERIVED_FIELDS = ("neighbors",)
+
+
+def section_sort_key(section_id):
+    """Natural sort for dotted IDs, so 5.10 comes after 5.9 (and odd IDs like A.1 still compare)"""
+    return [(0, int(p), "") if p.isdigit() else (1, 0, p) for p in str(section_id).split(".")]
+
+
+def chapter_of(section_id):
+    return str(section_id).split(".")[0] or "misc"
+
+
+def shard_name(chapter):
+    return f"chapter_{re.sub(r'[^0-9A-Za-z_-]', '_', chapter)}.ndjson"
+
+
+def change_record(sid, data):
+    record = {"section_id": str(sid)}
+    record.update((k, v) for k, v in data.items() if k not in DERIVED_FIELDS)
+    if "new_text" in record and record["new_text"] == record.get("text"):
+        del record["new_text"]
+    return record
+
+
+def export_changes(changes, out_dir):
+    """
+    Writes {section_id: node attributes} as per-chapter NDJSON shards plus an
+    index, streaming record by record. Shards are written under temporary
+    names and renamed, then the index that points at them; shards of chapters
+    that no longer have changes are removed only after the new index is in
+    place, so readers never see an index pointing at missing files. Returns the index.
+    """
+    out_dir = Path(out_dir)
+    shard_dir = out_dir / SHARD_DIR
+    shard_dir.mkdir(parents=True, exist_ok=True)
+
+    shards = {}
+    sections = {}
+    counts = Counter()
+
+    try:
+        for sid in sorted(changes, key=section_sort_key):
+            data = changes[sid]
+            change_type = data.get("type")
+            if not change_type:
+                continue  # Placeholder nodes created by references to sections that were never parsed
+
+            line = json.dumps(change_record(sid, data), ensure_ascii=False, default=str) + "\n"
+            chapter = chapter_of(sid)
+
+            if chapter not in shards:
+                path = shard_dir / (shard_name(chapter) + ".tmp")
+                shards[chapter] = {"file": open(path, "w", encoding="utf-8"), "count": 0, "counts": Counter()}
+            shard = shards[chapter]
+            shard["file"].write(line)
+            shard["count"] += 1
+            shard["counts"][change_type] += 1
+
+            sections[str(sid)] = {"shard": chapter, "type": change_type}
+            counts[change_type] += 1
+    finally:
+        for shard in shards.values():
+            shard["file"].close()
+
+    # Publish the shards, then the index that points at them
+    for chapter in shards:
+        os.replace(shard_dir / (shard_name(chapter) + ".tmp"), shard_dir / shard_name(chapter))
+
+    index = {
+        "version": 2,
+        "total": sum(counts.values()),
+        "counts": dict(counts),
+        "shards": {
+            chapter: {
+                "path": f"{SHARD_DIR}/{shard_name(chapter)}",
+                "count": shard["count"],
+                "counts": dict(shard["counts"]),
+                "bytes": (shard_dir / shard_name(chapter)).stat().st_size,
+            }
+            for chapter, shard in sorted(shards.items(), key=lambda item: section_sort_key(item[0]))
+        },
+        "sections": sections,
+    }
+    index_tmp = out_dir / (INDEX_NAME + ".tmp")
+    with open(index_tmp, "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(index_tmp, out_dir / INDEX_NAME)
+
+    # Only now drop shards of chapters that no longer have changes (and the pre-v2 full stream)
+    current = {shard_name(chapter) for chapter in shards}
+    for stale in shard_dir.glob("chapter_*.ndjson"):
+        if stale.name not in current:
+            stale.unlink()
+    legacy = out_dir / "changes.ndjson"
+    if legacy.exists():
+        legacy.unlink()
+    return index
+
+
+def copy_export(src_dir, dest_dir):
+    """Mirrors an export (e.g. into the frontend's public data folder)"""
+    dest_dir = Path(dest_dir)
+    if dest_dir.exists():
+        shutil.rmtree(dest_dir)
+    shutil.copytree(src_dir, dest_dir)
+
+
+def load_index(out_dir):
+    with open(Path(out_dir) / INDEX_NAME, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_changes(out_dir, chapter=None, index=None):
+    """Streams change records, from one chapter's shard or from every shard in section order"""
+    out_dir = Path(out_dir)
+    index = index or load_index(out_dir)
+    chapters = list(index["shards"]) if chapter is None else [str(chapter)]
+    for name in chapters:
+        shard = index["shards"].get(name)
+        if shard is None:
+            continue
+        with open(out_dir / shard["path"], "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def load_section_change(out_dir, section_id, index=None):
+    """The change record of one section, reading only its chapter's shard"""
+    index = index or load_index(out_dir)
+    entry = index["sections"].get(str(section_id))
+    if entry is None:
+        return None
+    for record in iter_changes(out_dir, entry["shard"], index):
+        if record["section_id"] == str(section_id):
+            return record
+    return None
@@ -0,0 +1,59 @@
+import numpy as np
+
+# Upper bound on similarity matrix cells held in memory at once (~64 MB of float32)
+MAX_BLOCK_CELLS = 16_000_000
+
+
+def match_moved_sections(removed_ids, removed_emb, added_ids, added_emb, threshold=0.9, top_k=5):
+    """
+    Pairs removed sections with added sections that carry the same content
+    under a new number (renumbered / moved clauses).
+
+    Embeddings must be L2-normalized so the dot product is the cosine.
+    The removed x added similarity matrix is computed in row blocks to bound
+    memory; each row keeps its `top_k` candidates above `threshold`, and the
+    candidates are then assigned greedily by descending score (one-to-one).
+
+    Returns a list of (old_id, new_id, similarity).
+    """
+    if len(removed_ids) == 0 or len(added_ids) == 0:
+        return []
+
+    removed_emb = np.asarray(removed_emb, dtype=np.float32)
+    added_emb = np.asarray(added_emb, dtype=np.float32)
+    added_t = np.ascontiguousarray(added_emb.T)
+
+    n_added = added_emb.shape[0]
+    k = min(top_k, n_added)
+    block_rows = max(1, MAX_BLOCK_CELLS // n_added)
+
+    cand_rows, cand_cols, cand_scores = [], [], []
+    for start in range(0, removed_emb.shape[0], block_rows):
+        sims = removed_emb[start:start + block_rows] @ added_t
+
+        if k < n_added:
+            cols = np.argpartition(sims, -k, axis=1)[:, -k:]
+        else:
+            cols = np.broadcast_to(np.arange(n_added), sims.shape)
+        scores = np.take_along_axis(sims, cols, axis=1)
+
+        rows, idx = np.nonzero(scores >= threshold)
+        cand_rows.append(rows + start)
+        cand_cols.append(cols[rows, idx])
+        cand_scores.append(scores[rows, idx])
+
+    rows = np.concatenate(cand_rows)
+    cols = np.concatenate(cand_cols)
+    scores = np.concatenate(cand_scores)
+
+    matches = []
+    used_rows, used_cols = set(), set()
+    for i in np.argsort(-scores, kind="stable"):
+        r, c = int(rows[i]), int(cols[i])
+        if r in used_rows or c in used_cols:
+            continue
+        used_rows.add(r)
+        used_cols.add(c)
+        matches.append((removed_ids[r], added_ids[c], round(float(scores[i]), 3)))
+
+    return matches
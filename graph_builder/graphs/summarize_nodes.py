@@ -1,13 +1,15 @@
 from dotenv import load_dotenv
 load_dotenv()
 
+import hashlib
+import json
 import os
+import sys
 import time
 import networkx as nx
-from openai import OpenAI
 
-# Load your OpenAI API key from .env
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+from shared.llm import CircuitOpenError, LLMError, get_llm_provider
 
 SYSTEM_PROMPT = (
     "You're an expert summarizer for technical documents. "
@@ -15,49 +17,158 @@ SYSTEM_PROMPT = (
     "Avoid repeating the section number. Be clear and concise."
 )
 
-def summarize_text_gpt(text, retries=3, delay=2):
+UNTITLED = "Untitled Section"
+# Times a run waits for an open circuit to go half-open, without a success in between, before it gives up
+MAX_CIRCUIT_WAITS = 3
+TITLE_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../data/title_cache.json"))
+
+
+class TitleCache:
+    """
+    Persistent content-addressed cache of title summaries, shared across builds
+    and releases. Keyed by hash of (prompt, provider identity, normalized text), so
+    the same text under another section ID or in another release is never
+    re-summarized, and titles from the echo provider or a stub server never
+    stand in for real ones.
+    """
+
+    def __init__(self, path=TITLE_CACHE_PATH, save_every=50):
+        self.path = path
+        self.save_every = save_every
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+        self._unsaved = 0
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    @staticmethod
+    def key(text, identity):
+        normalized = " ".join(text.split())
+        payload = "\x1f".join([SYSTEM_PROMPT, identity, normalized])
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        title = self.entries.get(key)
+        if title is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return title
+
+    def put(self, key, title):
+        self.entries[key] = title
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def save(self):
+        if not self._unsaved and os.path.exists(self.path):
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+        self._unsaved = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "entries": len(self.entries),
+        }
+
+
+def summarize_text_gpt(text, cache=None):
     """
-    Sends section text to GPT-3.5 to generate a one-line title.
+    Returns a one-line title for section text, from the cache when possible,
+    otherwise from the LLM provider (which handles retries, deadline and
+    circuit breaking). Raises LLMError when the call fails; failures are never cached.
     """
     if not text.strip():
-        return "Untitled Section"
-
-    for attempt in range(retries):
-        try:
-            response = client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {"role": "system", "content": SYSTEM_PROMPT},
-                    {"role": "user", "content": text.strip()}
-                ],
-                temperature=0.4,
-                max_tokens=32,
-            )
-            return response.choices[0].message.content.strip()
-        except Exception as e:
-            print(f"⚠️ GPT error (attempt {attempt + 1}): {e}")
-            time.sleep(delay)
-
-    return "Untitled Section"
-
-def summarize_graph_nodes(G: nx.DiGraph):
+        return UNTITLED
+
+    provider = get_llm_provider()
+    key = TitleCache.key(text, provider.identity) if cache is not None else None
+    if key is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    title = provider.complete(
+        messages=[
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": text.strip()}
+        ],
+        temperature=0.4,
+        max_tokens=32,
+    )
+
+    if key is not None:
+        cache.put(key, title)
+    return title
+
+def summarize_graph_nodes(G: nx.DiGraph, cache=None, max_circuit_waits=MAX_CIRCUIT_WAITS):
     """
-    Loops over graph nodes and adds a 'title' field using GPT-3.5
+    Loops over graph nodes and adds a 'title' field using the LLM.
+    Empty-text nodes (sections that are only referenced) get UNTITLED without a call.
+    Nodes whose call fails keep no title, so the next run retries them. When the
+    circuit breaker opens the run waits until a trial call is allowed, and after
+    `max_circuit_waits` waits without a success it is aborted with CircuitOpenError.
     """
-    print("✍️  Summarizing node content using GPT-3.5...")
+    print("✍️  Summarizing node content...")
+    cache = cache if cache is not None else TitleCache()
     enriched_count = 0
-
-    for node_id, data in G.nodes(data=True):
-        if "title" in data and data["title"].strip():
-            continue  # Skip if already has a title
-
-        text = data.get("text", "").strip()
-        summary = summarize_text_gpt(text)
-        G.nodes[node_id]["title"] = summary
-        enriched_count += 1
-        print(f"📝 {node_id}: {summary}")
-
-    print(f"✅ Added summaries to {enriched_count} nodes.")
+    empty_count = 0
+    failed_count = 0
+    circuit_waits = 0
+
+    try:
+        for node_id, data in G.nodes(data=True):
+            text = (data.get("text") or "").strip()
+            title = (data.get("title") or "").strip()
+            # UNTITLED on a node with text was left by an older failed run; retry it
+            if title and not (title == UNTITLED and text):
+                continue  # Skip if already has a title
+
+            if not text:
+                G.nodes[node_id]["title"] = UNTITLED
+                empty_count += 1
+                continue
+
+            summary = None
+            while summary is None:
+                try:
+                    summary = summarize_text_gpt(text, cache)
+                except CircuitOpenError as e:
+                    if circuit_waits >= max_circuit_waits:
+                        print(f"❌ LLM circuit still open, aborting summarization after {enriched_count} titles; the rest are retried next run")
+                        raise
+                    circuit_waits += 1
+                    print(f"⏸️  LLM circuit open, waiting {e.retry_after:.1f}s for a trial call ({circuit_waits}/{max_circuit_waits})")
+                    time.sleep(e.retry_after)
+                except LLMError as e:
+                    print(f"⚠️ {node_id}: LLM error, left without a title for the next run: {e}")
+                    break
+            if summary is None:
+                G.nodes[node_id].pop("title", None)
+                failed_count += 1
+                continue
+
+            circuit_waits = 0
+            G.nodes[node_id]["title"] = summary
+            enriched_count += 1
+            print(f"📝 {node_id}: {summary}")
+    finally:
+        cache.save()
+
+    stats = cache.stats()
+    print(f"✅ Added summaries to {enriched_count} nodes ({empty_count} empty nodes skipped, {failed_count} failed).")
+    print(f"🗃️  Title cache: {stats['hits']} hits, {stats['misses']} misses (hit rate {stats['hit_rate']:.0%}), {stats['entries']} entries")
     return G
 
 
@@ -1,4 +1,5 @@
 import networkx as nx
+from collections import deque
 
 def generate_user_friendly_summary(graph: nx.DiGraph, start_node: str, max_depth=2):
     """
@@ -9,8 +10,8 @@ def generate_user_friendly_summary(graph: nx.DiGraph, start_node: str, max_depth
         return f"❌ Section {start_node} not found in the graph."
 
     summary = []
-    visited = set()
-    queue = [(start_node, 0)]
+    visited = {start_node}
+    queue = deque([(start_node, 0)])
 
     emoji_map = {
         "added": "➕",
@@ -20,10 +21,7 @@ def generate_user_friendly_summary(graph: nx.DiGraph, start_node: str, max_depth
     }
 
     while queue:
-        node, depth = queue.pop(0)
-        if node in visited or depth > max_depth:
-            continue
-        visited.add(node)
+        node, depth = queue.popleft()
 
         data = graph.nodes[node]
         change_type = data.get("type", "unchanged")
@@ -34,7 +32,11 @@ def generate_user_friendly_summary(graph: nx.DiGraph, start_node: str, max_depth
         emoji = emoji_map.get(change_type, "🔹")
         summary.append(f"{emoji} Section {node} ({change_type}):\n → {short_text}\n")
 
+        if depth == max_depth:
+            continue
         for neighbor in graph.neighbors(node):
-            queue.append((neighbor, depth + 1))
+            if neighbor not in visited:
+                visited.add(neighbor)
+                queue.append((neighbor, depth + 1))
 
     return "\n".join(summary)
@@ -1,14 +1,28 @@
 import networkx as nx
+from collections import deque
+
+def bounded_bfs(graph: nx.DiGraph, section_id: str, depth=2):
+    """Single breadth-first pass returning {node: hop distance} up to `depth` hops (root excluded)"""
+    distances = {section_id: 0}
+    queue = deque([section_id])
+    while queue:
+        node = queue.popleft()
+        d = distances[node]
+        if d >= depth:
+            continue
+        for neighbor in graph.successors(node):
+            if neighbor not in distances:
+                distances[neighbor] = d + 1
+                queue.append(neighbor)
+    del distances[section_id]
+    return distances
 
 def downstream_impact(graph: nx.DiGraph, section_id: str, depth=2):
     """
     Returns a list of nodes affected by a section, up to `depth` hops away.
     E.g. "If 4.3.2 is modified, which sections depend on it?"
     """
-    impacted = set()
-    for d in range(1, depth + 1):
-        impacted |= nx.descendants_at_distance(graph, section_id, d)
-    return list(impacted)
+    return list(bounded_bfs(graph, section_id, depth))
 
 def inspect_node(graph: nx.DiGraph, section_id: str):
     """Prints node attributes for easy debugging"""
@@ -48,6 +48,7 @@ def visualize_semantic_graph(graph: nx.DiGraph, output_html="graph.html", sectio
         "added": "#7FFF00",       # light green
         "removed": "#FF4500",     # orange red
         "modified": "#FFD700",    # gold
+        "moved": "#1E90FF",       # dodger blue
         "unchanged": "#A9A9A9",   # dark gray
     }
 
@@ -55,6 +56,7 @@ def visualize_semantic_graph(graph: nx.DiGraph, output_html="graph.html", sectio
         "added": 20,
         "removed": 20,
         "modified": 18,
+        "moved": 18,
         "unchanged": 10
     }
 
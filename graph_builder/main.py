@@ -1,10 +1,10 @@
 from pathlib import Path
-import json
 import pickle
 import networkx as nx
 import os
 import sys
-import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 # --- Project modules ---
 from parser.read_doc import read_doc
@@ -13,6 +13,9 @@ from graphs.builder import build_semantic_graph, build_graph_from_sections
 from graphs.visualizer import visualize_semantic_graph, export_to_html
 from graphs.traversals import downstream_impact
 from graphs.summarizer import generate_user_friendly_summary
+from graphs.exporter import export_changes, copy_export
+from shared.metrics import build_stage, write_textfile
+from shared.tables import build_table_store, save_table_store
 
 BASE_DIR = Path(__file__).resolve().parent.parent  # Goes up to 3GPP Chat Bot/
 FRONTEND_PUBLIC_DATA_DIR = BASE_DIR / "frontend" / "public" / "data"
@@ -23,13 +26,19 @@ VIEW_DIR = DATA_DIR / "graph_views"
 def sanitize_keys(data):
     return {str(k): v for k, v in data.items()}
 
-def write_changes_json(changes, path="data/changes.json"):
+def write_changes(changes, out_dir=DATA_DIR / "changes"):
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(sanitize_keys(changes), f, indent=2)
-        print(f"📝 {len(changes)} changed sections saved to {path}")
+        index = export_changes(sanitize_keys(changes), out_dir)
+        print(f"📝 {index['total']} changed sections saved to {out_dir} in {len(index['shards'])} chapter shards")
+        copy_export(out_dir, FRONTEND_PUBLIC_DATA_DIR / "changes")
     except Exception as e:
-        print(f"❌ Failed to write changes.json: {e}")
+        print(f"❌ Failed to export changes: {e}")
+
+def write_table_store(sections, path):
+    """Row-level index over the tables of the current release (the .doc text carries no tables)"""
+    store = build_table_store(sections)
+    save_table_store(store, path)
+    print(f"📊 {len(store['rows'])} table rows indexed ({len(store['keys'])} IEI/cause keys) in {path}")
 
 def launch_graph_gui():
     import subprocess
@@ -54,7 +63,8 @@ def load_cached_graph(graph_path):
 def flatten_section(section):
     if not section or not isinstance(section, dict) or "content" not in section:
         return ""
-    return " ".join(entry.get("text", "") for entry in section["content"])
+    # One paragraph per line, so the sentence diff keeps paragraph boundaries
+    return "\n".join(entry.get("text", "") for entry in section["content"])
 
 def normalize_keys(d):
     return {k.split("\t")[0].strip(): v for k, v in d.items()}
@@ -63,18 +73,18 @@ def main():
     rel10_path = DATA_DIR / "24301-af0.doc"
     rel17_path = DATA_DIR / "24301-hc0.docx"
     graph_path = DATA_DIR / "unified_graph.pkl"
-    changes_path = DATA_DIR / "changes.json"
+    changes_dir = DATA_DIR / "changes"
+    changes_index_path = changes_dir / "index.json"
+    table_store_path = DATA_DIR / "table_store.json"
 
     os.makedirs(DATA_DIR, exist_ok=True)
     os.makedirs(GRAPH_DIR, exist_ok=True)
     os.makedirs(VIEW_DIR, exist_ok=True)
 
     # -------- Cached Mode --------
-    if graph_path.exists() and changes_path.exists():
-        print("✅ Using cached graph and changes.json.")
+    if graph_path.exists() and changes_index_path.exists():
+        print("✅ Using cached graph and change export.")
         G = load_cached_graph(graph_path)
-        with open(changes_path, "r", encoding="utf-8") as f:
-            changes = json.load(f)
 
         try:
             print("📄 Re-reading documents for tooltip rendering and fallback graph generation...")
@@ -85,6 +95,10 @@ def main():
             sections10 = normalize_keys(sections10_raw)
             sections17 = normalize_keys(sections17_raw)
 
+            if not table_store_path.exists():
+                print("🔄 Table store missing. Rebuilding...")
+                write_table_store(sections17, table_store_path)
+
             # 🔁 Build individual graphs if missing
             graph10_path = GRAPH_DIR / "graph_10.pkl"
             graph17_path = GRAPH_DIR / "graph_17.pkl"
@@ -130,57 +144,58 @@ def main():
             print(f"❌ File not found: {rel17_path}")
             return
 
-        start_time = time.perf_counter()
         # -------- Read and Parse --------
         print("📄 Reading documents...")
         try:
-            text10 = read_doc(rel10_path)
-            text17 = read_doc(rel17_path)
+            with build_stage("read"):
+                text10 = read_doc(rel10_path)
+                text17 = read_doc(rel17_path)
         except Exception as e:
             print(f"❌ Failed to read documents: {e}")
             return
 
         print("🔍 Splitting into structured sections...")
-        sections10_raw = split_text_into_sections(text10)       # .doc → plain text
-        sections17_raw = split_docx_into_sections(rel17_path)   # .docx → structured
+        with build_stage("split"):
+            sections10_raw = split_text_into_sections(text10)       # .doc → plain text
+            sections17_raw = split_docx_into_sections(rel17_path)   # .docx → structured
 
-        sections10 = normalize_keys(sections10_raw)
-        sections17 = normalize_keys(sections17_raw)
+            sections10 = normalize_keys(sections10_raw)
+            sections17 = normalize_keys(sections17_raw)
+
+        # -------- Table Rows --------
+        with build_stage("tables"):
+            write_table_store(sections17, table_store_path)
 
         # -------- Flatten for Semantic Graph --------
         print("🧠 Building unified semantic graph...")
-        flattened10 = {sid: flatten_section(sec) for sid, sec in sections10.items()}
-        flattened17 = {sid: flatten_section(sec) for sid, sec in sections17.items()}
+        with build_stage("semantic_graph"):
+            flattened10 = {sid: flatten_section(sec) for sid, sec in sections10.items()}
+            flattened17 = {sid: flatten_section(sec) for sid, sec in sections17.items()}
 
-        G = build_semantic_graph(flattened10, flattened17)
-        
-        end_time = time.perf_counter()
-        print(f"✅ Graph built with {len(G.nodes)} nodes and {len(G.edges)} edges in {end_time - start_time:.2f} seconds.")
+            G = build_semantic_graph(flattened10, flattened17)
 
+        print(f"✅ Graph built with {len(G.nodes)} nodes and {len(G.edges)} edges.")
 
         # -------- Individual Version Graphs --------
-        start_time = time.perf_counter()
-        graph10 = build_graph_from_sections(flattened10)
-        graph17 = build_graph_from_sections(flattened17)
-        end_time = time.perf_counter()
-        print(f"✅ Individual graph built in {end_time - start_time:.2f} seconds.")
-        
+        with build_stage("individual_graphs"):
+            graph10 = build_graph_from_sections(flattened10)
+            graph17 = build_graph_from_sections(flattened17)
+
         with open(GRAPH_DIR / "graph_10.pkl", "wb") as f:
             pickle.dump(graph10, f)
         with open(GRAPH_DIR / "graph_17.pkl", "wb") as f:
             pickle.dump(graph17, f)
 
-        export_to_html(graph10, VIEW_DIR / "graph_10.html", title="3GPP Rel-10 Graph")
-        export_to_html(graph17, VIEW_DIR / "graph_17.html", title="3GPP Rel-17 Graph")
+        with build_stage("individual_html"):
+            export_to_html(graph10, VIEW_DIR / "graph_10.html", title="3GPP Rel-10 Graph")
+            export_to_html(graph17, VIEW_DIR / "graph_17.html", title="3GPP Rel-17 Graph")
         print("📦 Individual version graphs saved in 'graphs/' and visualized in 'graph_views/'")
 
         # -------- Summarize Nodes with GPT --------
         try:
-            start_time = time.perf_counter()
             from graphs.summarize_nodes import summarize_graph_nodes
-            G = summarize_graph_nodes(G)
-            end_time = time.perf_counter()
-            print(f"✅ Node title summarization done in {end_time - start_time:.2f} seconds.")
+            with build_stage("summarize"):
+                G = summarize_graph_nodes(G)
             # Re-save enriched graph
             with open(graph_path, "wb") as f:
                 pickle.dump(G, f)
@@ -197,16 +212,22 @@ def main():
             sid: data for sid, data in G.nodes(data=True)
             if data.get("type") != "unchanged"
         }
-        write_changes_json(changes, changes_path)
+        with build_stage("export_changes"):
+            write_changes(changes, changes_dir)
 
     # -------- Visualization --------
     print("🌐 Generating interactive visualization...")
     data_output_path = DATA_DIR / "graph.html"
     frontend_output_path = FRONTEND_PUBLIC_DATA_DIR / "graph.html"
-    visualize_semantic_graph(G, output_html=str(data_output_path), sections10=sections10, sections17=sections17)
-    visualize_semantic_graph(G, output_html=str(frontend_output_path), sections10=sections10, sections17=sections17)
+    with build_stage("visualize"):
+        visualize_semantic_graph(G, output_html=str(data_output_path), sections10=sections10, sections17=sections17)
+        visualize_semantic_graph(G, output_html=str(frontend_output_path), sections10=sections10, sections17=sections17)
     print("🎉 Visualization saved to graph.html")
 
+    # -------- Build Metrics --------
+    write_textfile(DATA_DIR / "build_metrics.prom")
+    print("📈 Stage timings written to build_metrics.prom")
+
     # # -------- Optional: Impact Test --------
     # test_section = "4.3.2"
     # if test_section in G:
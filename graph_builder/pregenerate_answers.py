@@ -0,0 +1,165 @@
+"""
+Warms the backend's response cache after a release ingest.
+
+Generates template questions for every changed section (plus any questions
+from a query log), runs the backend's retrieval + generation for them
+concurrently and stores the answers with their query embeddings in
+backend/cache_warm_responses.json / cache_warm_embeddings.npy.
+
+    python pregenerate_answers.py --workers 8 --query-log ../data/query_log.txt
+"""
+
+import argparse
+import json
+import pickle
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = BASE_DIR / "backend"
+DATA_DIR = BASE_DIR / "data"
+GRAPH_PATH = DATA_DIR / "unified_graph.pkl"
+TABLE_STORE_PATH = DATA_DIR / "table_store.json"
+
+sys.path.insert(0, str(BASE_DIR))
+sys.path.insert(0, str(BACKEND_DIR))
+
+from router import build_route_indexes, route_query
+from retrieval import top_section, build_context, build_messages
+from shared_index import build_corpus, load_or_build_embeddings
+from singleflight import normalize_query
+from warm_cache import WarmCache, save_warm_cache
+from shared.llm import LLMError, get_llm_provider
+from shared.tables import TableIndex
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Questions the router answers without the LLM ("what changed in 5.5.1.2") are not templated here
+QUESTION_TEMPLATES = {
+    "modified": ["what changed in {title}?", "explain {title}"],
+    "added": ["what is {title}?", "explain {title}"],
+    "removed": ["what happened to {title}?"],
+    "moved": ["explain {title}"],
+}
+
+
+def template_questions(G, max_sections=None):
+    """Template questions for every changed section that has a usable title"""
+    questions = []
+    sections = 0
+    for node_id, data in G.nodes(data=True):
+        templates = QUESTION_TEMPLATES.get(data.get("type"))
+        title = (data.get("title") or "").strip()
+        if not templates or not title or title == "Untitled Section":
+            continue
+        questions.extend(t.format(title=title.rstrip(".")) for t in templates)
+        sections += 1
+        if max_sections and sections >= max_sections:
+            break
+    return questions
+
+
+def read_query_log(path):
+    """One question per line, or JSON lines with a "query" field"""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                line = json.loads(line).get("query", "")
+            questions.append(line)
+    return questions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-generate answers for changed sections into the backend cache")
+    parser.add_argument("--query-log", help="file with extra questions (plain lines or JSONL with 'query')")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent LLM calls")
+    parser.add_argument("--max-sections", type=int, default=None, help="only template the first N changed sections")
+    parser.add_argument("--merge", action="store_true", help="keep existing warm entries instead of replacing them")
+    args = parser.parse_args()
+
+    if not GRAPH_PATH.exists():
+        print(f"❌ Graph file not found at {GRAPH_PATH}. Run main.py first.")
+        return
+
+    from dotenv import load_dotenv
+    from sentence_transformers import SentenceTransformer
+    load_dotenv()
+
+    start_time = time.perf_counter()
+    with open(GRAPH_PATH, "rb") as f:
+        G = pickle.load(f)
+    model = SentenceTransformer(MODEL_NAME)
+    node_ids, corpus = build_corpus(G)
+    corpus_embeddings = load_or_build_embeddings(model, MODEL_NAME, corpus, node_ids, str(GRAPH_PATH))
+    route_indexes = build_route_indexes(G)
+    table_index = TableIndex.load(TABLE_STORE_PATH)
+
+    # -------- Questions --------
+    questions = template_questions(G, args.max_sections)
+    if args.query_log:
+        questions += read_query_log(args.query_log)
+
+    existing = WarmCache.load() if args.merge else WarmCache()
+    seen = set(existing.entries)
+    unique_questions = []
+    for q in questions:
+        q = normalize_query(q)
+        if q and q not in seen and route_query(q, G, route_indexes, table_index) is None:
+            seen.add(q)
+            unique_questions.append(q)
+
+    print(f"❓ {len(unique_questions)} questions to answer ({len(questions)} generated, {len(existing)} already warm)")
+    if not unique_questions:
+        return
+
+    # -------- Retrieval (one batched encode) --------
+    query_embeddings = model.encode(unique_questions, batch_size=64, convert_to_numpy=True, normalize_embeddings=True)
+
+    # -------- Generation (concurrent) --------
+    llm = get_llm_provider()
+
+    def answer(i):
+        q = unique_questions[i]
+        top_node_id = top_section(query_embeddings[i], corpus_embeddings, node_ids)
+        full_context, highlights = build_context(G, top_node_id, q, table_rows=table_index.search(q))
+        messages, max_tokens = build_messages(q, full_context)
+        return i, {"answer": llm.complete(messages=messages, temperature=0.4, max_tokens=max_tokens), "highlight": highlights}
+
+    results = {}
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(answer, i) for i in range(len(unique_questions))]
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                i, entry = future.result()
+                results[i] = entry
+            except LLMError as e:
+                failed += 1
+                print(f"⚠️ Skipped a question after LLM error: {e}")
+            except Exception as e:
+                # One bad question (context build, malformed response...) must not end the whole job
+                failed += 1
+                print(f"⚠️ Skipped a question after error: {e!r}")
+            if done % 50 == 0:
+                print(f"📝 {done}/{len(futures)} answered")
+
+    # -------- Save, in embedding order --------
+    entries = dict(existing.entries)
+    embeddings = list(existing.embeddings)
+    for i in sorted(results):
+        entries[unique_questions[i]] = results[i]
+        embeddings.append(query_embeddings[i])
+    save_warm_cache(entries, embeddings)
+
+    end_time = time.perf_counter()
+    print(f"✅ {len(results)} answers pre-generated ({failed} failed), {len(entries)} warm entries saved in {end_time - start_time:.2f} seconds.")
+
+
+if __name__ == "__main__":
+    main()
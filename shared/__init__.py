@@ -0,0 +1 @@
+# Code shared by backend/ and graph_builder/ (add the project root to sys.path to import it)
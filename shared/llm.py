@@ -0,0 +1,225 @@
+"""
+LLM provider shared by the backend and the graph builder.
+
+Configuration (environment):
+    LLM_PROVIDER     openai (default) or echo (in-process, no network)
+    LLM_BASE_URL     OpenAI-compatible endpoint, e.g. http://localhost:8001/v1 for the stub server
+    LLM_MODEL        chat model name (default gpt-3.5-turbo)
+    LLM_TIMEOUT      per-call deadline in seconds, retries included (default 30)
+    LLM_MAX_RETRIES  retries after the first attempt (default 2)
+    LLM_POOL_SIZE    max pooled HTTP connections (default 20)
+"""
+
+import abc
+import os
+import random
+import threading
+import time
+
+from shared.metrics import logger
+
+# Request/auth errors won't succeed on retry (429 and 5xx will)
+NON_RETRYABLE_STATUS = {400, 401, 403, 404, 422}
+
+
+class LLMError(Exception):
+    """The LLM call failed (after retries)"""
+
+
+class LLMTimeout(LLMError):
+    """The per-call deadline expired"""
+
+
+class LLMRequestError(LLMError):
+    """The upstream rejected the request (4xx); retrying it won't help"""
+
+
+class CircuitOpenError(LLMError):
+    """Calls are short-circuited because the upstream kept failing; retry_after is in seconds"""
+
+    def __init__(self, message, retry_after=1.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    Only transient failures (timeouts, connection errors, 429, 5xx) count.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == "open" or (state == "half_open" and self._trial_in_flight):
+                # Until the circuit goes half-open, or roughly one call while a trial is in flight
+                remaining = self.reset_timeout - (time.monotonic() - self._opened_at)
+                retry_after = remaining if remaining > 0 else 1.0
+                raise CircuitOpenError("LLM circuit breaker is open; upstream recently failing", retry_after)
+            if state == "half_open":
+                self._trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class BaseProvider(abc.ABC):
+    def __init__(self, model, timeout=30.0, max_retries=2, backoff=0.5, breaker=None):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+
+    @property
+    def identity(self):
+        """Which backend produces the completions; cache keys include it so stub output never passes for real"""
+        return f"{type(self).__name__}|{self.model}"
+
+    @abc.abstractmethod
+    def _call(self, messages, temperature, max_tokens, timeout):
+        """One attempt; returns the message text or raises (status_code on HTTP errors)"""
+
+    def complete(self, messages, temperature=0.4, max_tokens=400, timeout=None):
+        """
+        Returns the assistant message text. The deadline covers all attempts;
+        retries back off exponentially with jitter. Raises LLMError subclasses:
+        LLMRequestError for rejected requests, CircuitOpenError while the
+        circuit is open, LLMTimeout / LLMError for transient failures.
+        """
+        self.breaker.before_call()
+        deadline = time.monotonic() + (timeout or self.timeout)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                text = self._call(messages, temperature, max_tokens, remaining)
+                self.breaker.record_success()
+                return text
+            except Exception as e:
+                last_error = e
+                logger.warning("⚠️ LLM error (attempt %s/%s): %s", attempt + 1, self.max_retries + 1, e)
+                if getattr(e, "status_code", None) in NON_RETRYABLE_STATUS:
+                    # The upstream answered, so this says nothing about its health
+                    self.breaker.record_success()
+                    raise LLMRequestError(str(e)) from e
+                if attempt < self.max_retries:
+                    sleep = min(self.backoff * (2 ** attempt) * (0.5 + random.random()), deadline - time.monotonic())
+                    if sleep > 0:
+                        time.sleep(sleep)
+
+        self.breaker.record_failure()
+        if last_error is None or time.monotonic() >= deadline:
+            raise LLMTimeout(f"LLM call exceeded {timeout or self.timeout:.1f}s deadline (last error: {last_error})")
+        raise LLMError(str(last_error)) from last_error
+
+
+class OpenAIProvider(BaseProvider):
+    """OpenAI (or any OpenAI-compatible server) over one pooled HTTP client"""
+
+    def __init__(self, model, base_url=None, pool_size=20, **kwargs):
+        super().__init__(model, **kwargs)
+        from openai import OpenAI, DefaultHttpxClient
+
+        try:
+            import httpx
+            http_client = DefaultHttpxClient(
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+            )
+        except ImportError:
+            http_client = None  # SDK builds its own pooled client with default limits
+
+        # One client per process so connections are reused; retries are ours (deadline-aware), not the SDK's
+        self.client = OpenAI(base_url=base_url, max_retries=0, timeout=self.timeout, http_client=http_client)
+
+    @property
+    def identity(self):
+        # The official API keeps the bare model name, so existing caches stay valid
+        if self.client.base_url.host == "api.openai.com":
+            return self.model
+        return f"openai|{self.client.base_url}|{self.model}"
+
+    def _call(self, messages, temperature, max_tokens, timeout):
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            timeout=timeout,
+        )
+        return response.choices[0].message.content.strip()
+
+
+class EchoProvider(BaseProvider):
+    """Offline provider: answers with the start of the last user message"""
+
+    def _call(self, messages, temperature, max_tokens, timeout):
+        return stub_completion(messages, max_tokens)
+
+
+def stub_completion(messages, max_tokens=400):
+    user = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    words = user.split()
+    return " ".join(words[:min(max_tokens, 12)]) or "Untitled Section"
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def get_llm_provider():
+    """Process-wide provider built from the LLM_* environment variables"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            kind = os.getenv("LLM_PROVIDER", "openai")
+            common = dict(
+                model=os.getenv("LLM_MODEL", "gpt-3.5-turbo"),
+                timeout=float(os.getenv("LLM_TIMEOUT", "30")),
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", "2")),
+            )
+            if kind == "echo":
+                _provider = EchoProvider(**common)
+            elif kind == "openai":
+                _provider = OpenAIProvider(
+                    base_url=os.getenv("LLM_BASE_URL") or None,
+                    pool_size=int(os.getenv("LLM_POOL_SIZE", "20")),
+                    **common,
+                )
+            else:
+                raise ValueError(f"Unknown LLM_PROVIDER {kind!r} (expected 'openai' or 'echo')")
+        return _provider
@@ -0,0 +1,143 @@
+"""
+Per-stage timing and counters for the backend and the graph builder,
+exported in Prometheus format.
+
+- Backend: GET /metrics (set PROMETHEUS_MULTIPROC_DIR when running several
+  gunicorn workers so every worker's samples are aggregated).
+- Graph builder: write_textfile() at the end of a run, for node_exporter's
+  textfile collector or for diffing between builds.
+
+Log verbosity is controlled by LOG_LEVEL (default INFO); full prompt
+contexts and answers are only logged at DEBUG.
+"""
+
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    write_to_textfile,
+    REGISTRY,
+)
+
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
+)
+logger = logging.getLogger("tgpp")
+
+# Sub-millisecond fast paths up to multi-second LLM calls
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# Graph builder stages run from seconds to tens of minutes
+BUILD_BUCKETS = (0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+STAGE_SECONDS = Histogram(
+    "tgpp_stage_seconds",
+    "Time spent per pipeline stage",
+    ["component", "stage"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "tgpp_request_seconds",
+    "End-to-end request latency by endpoint and how the request was served",
+    ["endpoint", "outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    "tgpp_requests_total",
+    "Requests by endpoint and how they were served (fast_path, warm_cache, fuzzy_cache, llm, shared, error...)",
+    ["endpoint", "outcome"],
+)
+
+# Admission control (backend/admission.py); gauges are summed over live workers
+ADMISSION_INFLIGHT = Gauge(
+    "tgpp_admission_inflight",
+    "Requests currently holding a slot of a limited stage",
+    ["stage"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_QUEUE_DEPTH = Gauge(
+    "tgpp_admission_queue_depth",
+    "Requests waiting for a slot of a limited stage",
+    ["stage"],
+    multiprocess_mode="livesum",
+)
+ADMISSION_WAIT_SECONDS = Histogram(
+    "tgpp_admission_wait_seconds",
+    "Time spent waiting for a stage slot, by priority",
+    ["stage", "priority"],
+    buckets=LATENCY_BUCKETS,
+)
+ADMISSION_REJECTED = Counter(
+    "tgpp_admission_rejected_total",
+    "Requests rejected with 503 because a stage was saturated (queue_full) or the wait timed out",
+    ["stage", "reason"],
+)
+
+# Request coalescing (backend/singleflight.py)
+SINGLEFLIGHT_INFLIGHT = Gauge(
+    "tgpp_singleflight_inflight",
+    "Distinct questions currently being answered that later identical requests can join",
+    multiprocess_mode="livesum",
+)
+
+# The graph builder gets its own registry so its textfile only holds build metrics
+BUILD_REGISTRY = CollectorRegistry()
+BUILD_STAGE_SECONDS = Histogram(
+    "tgpp_build_stage_seconds",
+    "Time spent per graph builder stage",
+    ["stage"],
+    buckets=BUILD_BUCKETS,
+    registry=BUILD_REGISTRY,
+)
+
+
+@contextmanager
+def stage(name, component="backend", request_id=None):
+    """Times a block into tgpp_stage_seconds{component, stage} and logs it at DEBUG"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.labels(component=component, stage=name).observe(elapsed)
+        logger.debug("[%s] %s.%s took %.4fs", request_id or "-", component, name, elapsed)
+
+
+@contextmanager
+def build_stage(name):
+    """Times a graph builder stage into the build registry and logs it"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        BUILD_STAGE_SECONDS.labels(stage=name).observe(elapsed)
+        logger.info("⏱️  build.%s took %.2fs", name, elapsed)
+
+
+def record_request(endpoint, outcome, seconds):
+    REQUESTS.labels(endpoint=endpoint, outcome=outcome).inc()
+    REQUEST_SECONDS.labels(endpoint=endpoint, outcome=outcome).observe(seconds)
+
+
+def metrics_response():
+    """(body, content_type) for a /metrics endpoint, aggregated across workers in multiprocess mode"""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def write_textfile(path):
+    """Writes the graph builder's stage timings in Prometheus text format"""
+    write_to_textfile(str(path), BUILD_REGISTRY)
@@ -0,0 +1,105 @@
+"""
+Local OpenAI-compatible stub for load tests and offline pipeline runs.
+
+    python shared/stub_llm_server.py --port 8001 --latency-ms 800 --jitter-ms 200 --error-rate 0.05
+    LLM_BASE_URL=http://localhost:8001/v1 OPENAI_API_KEY=stub python backend/app.py
+
+Serves POST /v1/chat/completions with a canned reply after the configured
+latency, failing a fraction of calls with HTTP 500 (or 429).
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from shared.llm import stub_completion
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    config = None  # argparse.Namespace, set in main()
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if self.config.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/") in ("/health", "/v1/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model"}]})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        if self.path.rstrip("/") != "/v1/chat/completions":
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+
+        cfg = self.config
+        time.sleep(max(0.0, cfg.latency_ms + random.uniform(-cfg.jitter_ms, cfg.jitter_ms)) / 1000)
+
+        roll = random.random()
+        if roll < cfg.error_rate:
+            self._send_json(500, {"error": {"message": "stub: injected server error", "type": "server_error"}})
+            return
+        if roll < cfg.error_rate + cfg.rate_limit_rate:
+            self._send_json(429, {"error": {"message": "stub: injected rate limit", "type": "rate_limit"}}, {"Retry-After": "1"})
+            return
+
+        content = stub_completion(request.get("messages", []), request.get("max_tokens") or 400)
+        self._send_json(200, {
+            "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()), "total_tokens": len(content.split())},
+        })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible stub LLM server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency-ms", type=float, default=500)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with HTTP 429")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    StubHandler.config = args
+    server = ThreadingHTTPServer((args.host, args.port), StubHandler)
+    server.daemon_threads = True
+    print(f"🧪 Stub LLM listening on http://{args.host}:{args.port}/v1 "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms, errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
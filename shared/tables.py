@@ -0,0 +1,173 @@
+"""
+Row-level store for specification tables.
+
+The graph builder turns every table captured by split_docx_into_sections
+into per-row records (header -> cell mapping plus the section it belongs to)
+and writes them with two indexes to data/table_store.json:
+
+    keys    "iei:5A", "cause:11"  -> row numbers   (typed lookups, one dict hit)
+    tokens  word in any cell      -> row numbers   (lexical search)
+
+The backend loads it into a TableIndex to answer IEI / cause value lookups
+directly and to add matching rows to the LLM context.
+"""
+
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+
+IEI_HEADER_RE = re.compile(r"\biei\b", re.I)
+CAUSE_HEADER_RE = re.compile(r"\bcause\b", re.I)
+IEI_VALUE_RE = re.compile(r"^([0-9A-F]{1,2}-?)$", re.I)
+CAUSE_NUMBER_RE = re.compile(r"#\s*(\d{1,3})\b")
+BINARY_RE = re.compile(r"^[01](?:\s*[01]){7}$")
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9\-/]*")
+
+# "IEI 5A", "iei: 2b", "cause #11", "cause value 22", "emm cause no. 7"
+IEI_QUERY_RE = re.compile(r"\biei\s*[:=]?\s*(?:0x)?([0-9a-f]{1,2}-?)(?![0-9a-z])")
+CAUSE_QUERY_RE = re.compile(r"\bcause\s*(?:value|code|number|no\.?)?\s*[:=]?\s*#?\s*(\d{1,3})\b")
+
+STOPWORDS = {
+    "the", "a", "an", "of", "in", "is", "for", "and", "or", "to", "what", "which", "does", "do",
+    "with", "by", "on", "value", "values", "table", "mean", "means", "explain", "show", "me",
+}
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def row_keys(cells):
+    """Typed keys for one row: IEI codes from IEI columns, cause numbers from cause columns"""
+    keys = set()
+    for header, value in cells.items():
+        value = value.strip()
+        if not value:
+            continue
+        if IEI_HEADER_RE.search(header):
+            match = IEI_VALUE_RE.match(value)
+            if match:
+                keys.add(f"iei:{match.group(1).upper()}")
+        if CAUSE_HEADER_RE.search(header) or CAUSE_NUMBER_RE.match(value):
+            if BINARY_RE.match(value):
+                keys.add(f"cause:{int(''.join(value.split()), 2)}")
+            for number in CAUSE_NUMBER_RE.findall(value):
+                keys.add(f"cause:{int(number)}")
+    return keys
+
+
+def table_rows(section_id, table_number, rows):
+    """Per-row records for one table; the first row is taken as the header"""
+    if len(rows) < 2:
+        return []
+    header = [h.strip() or f"column {i + 1}" for i, h in enumerate(rows[0])]
+    records = []
+    for row_number, row in enumerate(rows[1:], 1):
+        if not any(cell.strip() for cell in row):
+            continue
+        cells = {}
+        for i, cell in enumerate(row):
+            name = header[i] if i < len(header) else f"column {i + 1}"
+            # Merged cells come back from python-docx as repeated text; keep one copy
+            if name in cells and cells[name] == cell.strip():
+                continue
+            cells[name if name not in cells else f"{name} ({i + 1})"] = cell.strip()
+        records.append({"section_id": section_id, "table": table_number, "row": row_number, "cells": cells})
+    return records
+
+
+def build_table_store(sections):
+    """{section_id: {"tables": [{"rows": [...]}]}} -> store dict with rows and indexes"""
+    rows = []
+    for section_id, section in sections.items():
+        for table_number, table in enumerate(section.get("tables", []), 1):
+            rows.extend(table_rows(section_id, table_number, table.get("rows", [])))
+
+    keys = defaultdict(list)
+    tokens = defaultdict(list)
+    for i, record in enumerate(rows):
+        for key in row_keys(record["cells"]):
+            keys[key].append(i)
+        seen_tokens = set()
+        for value in record["cells"].values():
+            for token in tokenize(value):
+                if token not in seen_tokens:
+                    seen_tokens.add(token)
+                    tokens[token].append(i)
+
+    return {"version": 1, "rows": rows, "keys": dict(keys), "tokens": dict(tokens)}
+
+
+def save_table_store(store, path):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(store, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def format_row(record, title=None):
+    cells = " | ".join(f"{header}: {value}" for header, value in record["cells"].items() if value)
+    where = f"{record['section_id']}" + (f" {title}" if title else "")
+    return f"[{where}, table {record['table']} row {record['row']}] {cells}"
+
+
+class TableIndex:
+    """Read side of the table store"""
+
+    def __init__(self, store=None):
+        store = store or {"rows": [], "keys": {}, "tokens": {}}
+        self.rows = store["rows"]
+        self.keys = store["keys"]
+        self.tokens = store["tokens"]
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.rows)
+
+    def lookup(self, kind, value):
+        """Rows for an IEI ("iei", "5A") or cause value ("cause", 11)"""
+        value = str(int(value)) if kind == "cause" else str(value).upper()
+        return [self.rows[i] for i in self.keys.get(f"{kind}:{value}", [])]
+
+    def keyed_lookup(self, query_text):
+        """(label, rows) for an explicit IEI / cause value in the question, else None"""
+        query = query_text.lower()
+        match = IEI_QUERY_RE.search(query)
+        if match:
+            rows = self.lookup("iei", match.group(1))
+            if rows:
+                return f"IEI {match.group(1).upper()}", rows
+        match = CAUSE_QUERY_RE.search(query)
+        if match:
+            rows = self.lookup("cause", match.group(1))
+            if rows:
+                return f"cause #{int(match.group(1))}", rows
+        return None
+
+    def search(self, query_text, limit=5, min_matches=2):
+        """Keyed rows first, then rows sharing the most (idf-weighted) words with the question"""
+        keyed = self.keyed_lookup(query_text)
+        if keyed:
+            return keyed[1][:limit]
+
+        query_tokens = set(tokenize(query_text))
+        scores = Counter()
+        matched = Counter()
+        for token in query_tokens:
+            postings = self.tokens.get(token)
+            if not postings:
+                continue
+            idf = math.log(1 + len(self.rows) / len(postings))
+            for i in postings:
+                scores[i] += idf
+                matched[i] += 1
+        needed = min(min_matches, len(query_tokens))
+        return [self.rows[i] for i, _ in scores.most_common() if matched[i] >= needed][:limit]